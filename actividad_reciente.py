@@ -0,0 +1,152 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import database as db
+import eventos
+from instrumentacion import instrumentar
+from config import RECIENTES_DIAS_ATRAS, RECIENTES_DIAS_ADELANTE, RECIENTES_TTL
+
+# Registro de actividades de la ventana [desde, hasta] alrededor de hoy, compartido
+# por todas las sesiones del proceso y mantenido al día con el bus de eventos:
+# cada ejecución de "Actividades Recientes" o "Actividades Agendadas" lo lee de
+# memoria en lugar de volver a paginar el registro en Supabase.
+#
+# Los cambios llegan por eventos.publicar() desde las escrituras de database.
+# Con varios procesos o réplicas de la app, los cambios de los demás se pueden
+# recibir de Supabase Realtime con eventos.desde_realtime(); sin ello, se ven
+# al recargar la ventana (RECIENTES_TTL).
+_estado = {"registros": None, "ordenados": None, "desde": None, "hasta": None, "cargado": 0.0}
+_lock = threading.Lock()
+_lock_carga = threading.Lock()
+
+# Eventos recibidos mientras se carga la ventana (None si no hay carga en curso)
+_pendientes = None
+
+def _ventana():
+    """Fechas (ISO) de la ventana que se mantiene en memoria"""
+    hoy = date.today()
+    return (
+        (hoy - timedelta(days=RECIENTES_DIAS_ATRAS)).isoformat(),
+        (hoy + timedelta(days=RECIENTES_DIAS_ADELANTE)).isoformat()
+    )
+
+def _vigente(desde, hasta):
+    return (
+        _estado["registros"] is not None
+        and (_estado["desde"], _estado["hasta"]) == (desde, hasta)
+        and time.monotonic() - _estado["cargado"] < RECIENTES_TTL
+    )
+
+def _cargar(desde, hasta):
+    """Carga la ventana completa (una sola vez aunque la pidan varias sesiones a la vez)"""
+    global _pendientes
+    with _lock_carga:
+        with _lock:
+            if _vigente(desde, hasta):
+                return
+            _pendientes = []
+
+        try:
+            registros = db.get_registro_actividades(fecha_inicio=desde, fecha_fin=hasta)
+        except Exception:
+            with _lock:
+                _pendientes = None
+            raise
+
+        with _lock:
+            _estado.update(
+                registros={r["id"]: r for r in registros},
+                ordenados=None,
+                desde=desde,
+                hasta=hasta,
+                cargado=time.monotonic()
+            )
+            pendientes, _pendientes = _pendientes, None
+
+    # Los cambios publicados durante la carga pueden no estar incluidos en ella
+    for evento in pendientes:
+        _aplicar(evento)
+
+def _aplicar_registro(evento):
+    with _lock:
+        registros, desde, hasta = _estado["registros"], _estado["desde"], _estado["hasta"]
+        if registros is None:
+            return
+        # Solo interesan las filas de la ventana o que ya estaban en ella (p. ej. cambios de fecha)
+        ids = [
+            fila["id"] for fila in evento.filas
+            if fila["id"] in registros or not fila.get("fecha") or desde <= fila["fecha"] <= hasta
+        ]
+    if not ids:
+        return
+
+    # Las filas del evento no traen los datos embebidos (miembro, actividad, turno, monitor)
+    completos = [] if evento.tipo == "DELETE" else db.get_registros_por_id(ids)
+
+    with _lock:
+        if _estado["registros"] is not registros:
+            return
+        for id in ids:
+            registros.pop(id, None)
+        for registro in completos:
+            if desde <= registro["fecha"] <= hasta:
+                registros[registro["id"]] = registro
+        _estado["ordenados"] = None
+
+def _aplicar_miembros(evento):
+    with _lock:
+        registros = _estado["registros"]
+        if registros is None or evento.tipo != "UPDATE":
+            return
+        cambios = {fila["id"]: fila for fila in evento.filas}
+        for id, registro in list(registros.items()):
+            miembro = registro.get("miembros")
+            if miembro and miembro["id"] in cambios:
+                fila = cambios[miembro["id"]]
+                # Se sustituye el registro en lugar de modificarlo: otras sesiones pueden estar leyéndolo
+                registros[id] = {**registro, "miembros": {clave: fila.get(clave, valor) for clave, valor in miembro.items()}}
+        _estado["ordenados"] = None
+
+def _aplicar(evento):
+    if evento.tabla == "miembros":
+        _aplicar_miembros(evento)
+    else:
+        _aplicar_registro(evento)
+
+def _al_cambiar(evento):
+    with _lock:
+        if _pendientes is not None:
+            _pendientes.append(evento)
+            return
+    _aplicar(evento)
+
+eventos.suscribir("registro_actividades", _al_cambiar)
+eventos.suscribir("miembros", _al_cambiar)
+
+@instrumentar("recientes")
+def get_registros(fecha_inicio, fecha_fin):
+    """Registros entre dos fechas, de la más reciente a la más antigua; desde memoria si caen en la ventana"""
+    desde, hasta = _ventana()
+    if not (desde <= fecha_inicio and fecha_fin <= hasta):
+        return db.get_registro_actividades(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+
+    if not _vigente(desde, hasta):
+        _cargar(desde, hasta)
+
+    with _lock:
+        registros, ordenados = _estado["registros"], _estado["ordenados"]
+        if registros is not None and ordenados is None:
+            ordenados = _estado["ordenados"] = sorted(
+                registros.values(), key=lambda r: (r["fecha"], r["id"]), reverse=True
+            )
+
+    if registros is None:
+        # Vaciada entre tanto: se consulta directamente
+        return db.get_registro_actividades(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+    return [r for r in ordenados if fecha_inicio <= r["fecha"] <= fecha_fin]
+
+def vaciar():
+    """Descarta la ventana en memoria; se vuelve a cargar en la próxima consulta"""
+    with _lock:
+        _estado.update(registros=None, ordenados=None, desde=None, hasta=None, cargado=0.0)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from instrumentacion import instrumentar
+
+# Frecuencias de las series: semanal (semanas que empiezan en lunes) o mensual
+FRECUENCIAS = {"W": "Semanal", "M": "Mensual"}
+
+# Dimensiones del marco compacto por las que se puede desglosar la asistencia
+DIMENSIONES = {"actividad": "Actividad", "turno": "Turno", "seccion": "Sección"}
+
+def _periodos(marco, fecha_inicio, frecuencia):
+    """Fecha de inicio del período (semana o mes) de cada registro, como datetime64[D]"""
+    fechas = np.datetime64(fecha_inicio, "D") + marco["dia"].to_numpy().astype("timedelta64[D]")
+    if frecuencia == "M":
+        return fechas.astype("datetime64[M]").astype("datetime64[D]")
+    # El 1970-01-01 fue jueves: se desplaza para que las semanas empiecen en lunes
+    dias = fechas.astype(np.int64)
+    return (dias - (dias + 3) % 7).astype("datetime64[D]")
+
+def _indice_periodo(marco, fecha_inicio, frecuencia):
+    """Número de período (semana o mes) de cada registro, consecutivo entre períodos contiguos"""
+    fechas = np.datetime64(fecha_inicio, "D") + marco["dia"].to_numpy().astype("timedelta64[D]")
+    if frecuencia == "M":
+        return fechas.astype("datetime64[M]").astype(np.int64)
+    return (fechas.astype(np.int64) + 3) // 7
+
+@instrumentar("analitica")
+def serie_asistencia(marco, fecha_inicio, frecuencia="W", dimension="actividad"):
+    """Registros por período y valor de la dimensión: índice = inicio del período, columnas = ids"""
+    if marco.empty:
+        return pd.DataFrame()
+    periodos = _indice_periodo(marco, fecha_inicio, frecuencia)
+    primero = periodos.min()
+    valores, codigos = np.unique(marco[dimension].to_numpy(), return_inverse=True)
+
+    # Conteo por (período, valor) con un único bincount; los períodos sin registros quedan a 0
+    filas = periodos.max() - primero + 1
+    conteos = np.bincount((periodos - primero) * len(valores) + codigos, minlength=filas * len(valores))
+
+    inicio = _periodos(marco.iloc[[int(np.argmin(periodos))]], fecha_inicio, frecuencia)[0]
+    indice = pd.date_range(inicio, periods=filas, freq="W-MON" if frecuencia == "W" else "MS")
+    return pd.DataFrame(conteos.reshape(filas, len(valores)), index=indice, columns=valores)
+
+@instrumentar("analitica")
+def cohortes_retencion(marco, fecha_inicio, frecuencia="M"):
+    """Proporción de cada cohorte (período de su primera actividad) que vuelve en los períodos siguientes"""
+    if marco.empty:
+        return pd.DataFrame()
+    periodos = _indice_periodo(marco, fecha_inicio, frecuencia)
+    inicios = _periodos(marco, fecha_inicio, frecuencia)
+
+    # Un par (miembro, período) por cada período con alguna actividad
+    activos = pd.DataFrame({"miembro": marco["miembro"].to_numpy(), "periodo": periodos, "inicio": inicios})
+    activos = activos.drop_duplicates(["miembro", "periodo"])
+    por_miembro = activos.groupby("miembro")
+    activos["cohorte"] = por_miembro["inicio"].transform("min")
+    activos["edad"] = activos["periodo"] - por_miembro["periodo"].transform("min")
+
+    miembros = activos.pivot_table(index="cohorte", columns="edad", values="miembro", aggfunc="count", fill_value=0)
+    return miembros.div(miembros[0], axis=0)
+
+@instrumentar("analitica")
+def rachas(marco, fecha_inicio, frecuencia="W"):
+    """Racha máxima y racha actual (períodos consecutivos con actividad) de cada miembro"""
+    if marco.empty:
+        return pd.DataFrame(columns=["racha_maxima", "racha_actual"])
+    periodos = _indice_periodo(marco, fecha_inicio, frecuencia)
+    ultimo = periodos.max()
+
+    # Pares (miembro, período) únicos y ordenados, codificados en un solo entero
+    claves = np.unique((marco["miembro"].to_numpy().astype(np.int64) << 32) | periodos)
+    miembro, periodo = claves >> 32, claves & 0xFFFFFFFF
+
+    # Una racha empieza con cada miembro nuevo o cuando hay un hueco entre períodos
+    nueva = np.ones(len(miembro), dtype=bool)
+    nueva[1:] = (miembro[1:] != miembro[:-1]) | (periodo[1:] != periodo[:-1] + 1)
+    racha = np.cumsum(nueva)
+    longitud = np.bincount(racha)[racha]
+
+    # Último período de cada racha
+    es_final = np.append(nueva[1:], True)
+    finales = pd.DataFrame({"miembro": miembro, "longitud": longitud, "periodo": periodo})[es_final]
+    resultado = pd.DataFrame({
+        "racha_maxima": finales.groupby("miembro")["longitud"].max(),
+        # La racha actual es la que llega hasta el último período con datos
+        "racha_actual": finales[finales["periodo"] == ultimo].set_index("miembro")["longitud"]
+    })
+    return resultado.fillna({"racha_actual": 0}).astype(np.int32)
@@ -1,9 +1,27 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
+from functools import partial
 import database as db
-from config import APP_NAME
+import memo
+from instrumentacion import instrumentar, mostrar_panel
+from graficas import figura, mostrar_figura
+import analitica
+import actividad_reciente
+import diario
+from conversion import registros_a_dataframe
+from exportacion import FORMATOS, exportar
+from indices import indice_por_id, posicion
+from padron import get_padron
+from pestanas import pestanas_perezosas, mostrar_pestana
+from perezoso import importar_perezoso
+from config import (
+    APP_NAME, REGISTRO_TAMANO_PAGINA, EXPORTACION_TAMANO_PAGINA, BUSQUEDA_MIN_CARACTERES,
+    DEBUG_CONSULTAS, PANEL_RENDIMIENTO, DIARIO_LOCAL
+)
+
+# plotly.express se importa con la primera gráfica, no al mostrar la página de login
+px = importar_perezoso("plotly.express")
 
 # Configuración de la página
 st.set_page_config(
@@ -58,15 +76,31 @@ def show_dashboard():
         st.subheader("Menú")
         page = st.radio(
             "Ir a:",
-            ["Dashboard", "Gestión de Miembros", "Agendar Actividad", "Registro de Actividades", "Estadísticas", "Configuración"]
+            ["Dashboard", "Gestión de Miembros", "Agendar Actividad", "Registro de Actividades", "Estadísticas", "Tendencias", "Configuración"],
+            key="menu_pagina"
         )
         
+        if DIARIO_LOCAL:
+            mostrar_estado_diario()
+        
         st.divider()
         if st.button("Cerrar Sesión"):
             st.session_state.logged_in = False
             st.session_state.usuario = None
             st.session_state.current_page = "login"
             st.rerun()
+        
+        if DEBUG_CONSULTAS:
+            contador_consultas = st.empty()
+        
+        if PANEL_RENDIMIENTO:
+            panel_rendimiento = st.empty()
+    
+    memo.set_pagina(page)
+    
+    # Las filas cargadas del registro se descartan al salir de la página: al volver se leen de nuevo
+    if page != "Registro de Actividades":
+        st.session_state.pop("registro_filtros", None)
     
     # Mostrar la página seleccionada
     if page == "Dashboard":
@@ -79,31 +113,61 @@ def show_dashboard():
         show_registro_actividades_page()
     elif page == "Estadísticas":
         show_estadisticas_page()
+    elif page == "Tendencias":
+        show_tendencias_page()
     elif page == "Configuración":
         show_configuracion_page()
+    
+    if DEBUG_CONSULTAS:
+        ahorradas, por_pagina = memo.consultas_ahorradas()
+        contador_consultas.caption(
+            f"Consultas ahorradas en esta ejecución: {ahorradas} · "
+            f"en esta página durante la sesión: {por_pagina.get(page, 0)}"
+        )
+    
+    # El panel se dibuja al final para incluir las métricas de esta ejecución
+    if PANEL_RENDIMIENTO:
+        with panel_rendimiento.container():
+            mostrar_panel()
+
+# Indicador de registros anotados en el diario local pendientes de guardar
+def mostrar_estado_diario():
+    estado = diario.estado()
+    if estado["error"]:
+        st.warning(f"Sin conexión con la base de datos: {estado['pendientes']} registro(s) pendiente(s) de guardar")
+    elif estado["pendientes"]:
+        st.info(f"{estado['pendientes']} registro(s) pendiente(s) de guardar")
+    else:
+        st.caption("Todos los registros guardados")
 
 # Función para mostrar el dashboard principal
+@instrumentar("pagina")
 def show_dashboard_page():
     st.header("Dashboard")
     
-    # Obtener datos para el dashboard
+    hoy = datetime.now().strftime("%Y-%m-%d")
+    hace_7_dias = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+    hace_30_dias = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    
+    # Obtener datos para el dashboard (consultas independientes en paralelo)
+    datos = db.consultar_en_paralelo(
+        actividades_recientes=partial(actividad_reciente.get_registros, fecha_inicio=hace_7_dias, fecha_fin=hoy),
+        sin_actividades=partial(db.get_estadisticas_miembros_sin_actividades, fecha_inicio=hace_30_dias, fecha_fin=hoy),
+        est_seccion=partial(db.get_estadisticas_actividades_por_seccion, fecha_inicio=hace_30_dias, fecha_fin=hoy),
+        est_grupo=partial(db.get_estadisticas_actividades_por_grupo, fecha_inicio=hace_30_dias, fecha_fin=hoy)
+    )
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Actividades recientes
         st.subheader("Actividades Recientes")
-        actividades_recientes = db.get_registro_actividades(
-            fecha_inicio=(datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d"),
-            fecha_fin=datetime.now().strftime("%Y-%m-%d")
-        )
+        actividades_recientes = datos["actividades_recientes"]
         
         if actividades_recientes:
-            df_recientes = pd.DataFrame([{
-                "Fecha": a["fecha"],
-                "Miembro": f"{a['miembros']['nombre']} {a['miembros']['apellidos']}",
-                "Actividad": a["actividades"]["nombre"],
-                "Turno": a["turnos"]["nombre"]
-            } for a in actividades_recientes])
+            df_recientes = registros_a_dataframe(actividades_recientes)[
+                ["Fecha", "Miembro", "Actividad", "Turno"]
+            ]
             
             st.dataframe(df_recientes, use_container_width=True)
         else:
@@ -112,10 +176,7 @@ def show_dashboard_page():
     with col2:
         # Miembros sin actividades recientes
         st.subheader("Miembros sin Actividades Recientes")
-        sin_actividades = db.get_estadisticas_miembros_sin_actividades(
-            fecha_inicio=(datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
-            fecha_fin=datetime.now().strftime("%Y-%m-%d")
-        )
+        sin_actividades = datos["sin_actividades"]
         
         if not sin_actividades.empty:
             st.dataframe(
@@ -129,103 +190,95 @@ def show_dashboard_page():
     st.subheader("Resumen de Actividades")
     col1, col2 = st.columns(2)
     
-    # Obtener datos para las gráficas
-    est_seccion = db.get_estadisticas_actividades_por_seccion(
-        fecha_inicio=(datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
-        fecha_fin=datetime.now().strftime("%Y-%m-%d")
-    )
-    
-    est_grupo = db.get_estadisticas_actividades_por_grupo(
-        fecha_inicio=(datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"),
-        fecha_fin=datetime.now().strftime("%Y-%m-%d")
-    )
+    # Datos para las gráficas
+    est_seccion = datos["est_seccion"]
+    est_grupo = datos["est_grupo"]
     
     with col1:
         if not est_seccion.empty:
-            fig = px.bar(
+            fig = figura(
+                px.bar,
                 est_seccion,
+                "dashboard_seccion",
                 x="seccion",
                 y="total",
                 color="actividad",
                 title="Actividades por Sección (Últimos 30 días)",
                 labels={"seccion": "Sección", "total": "Total de Actividades", "actividad": "Tipo de Actividad"}
             )
-            st.plotly_chart(fig, use_container_width=True)
+            mostrar_figura(fig)
         else:
             st.info("No hay datos suficientes para la gráfica")
     
     with col2:
         if not est_grupo.empty:
-            fig = px.bar(
+            fig = figura(
+                px.bar,
                 est_grupo,
+                "dashboard_grupo",
                 x="grupo",
                 y="total",
                 color="actividad",
                 title="Actividades por Grupo (Últimos 30 días)",
                 labels={"grupo": "Grupo", "total": "Total de Actividades", "actividad": "Tipo de Actividad"}
             )
-            st.plotly_chart(fig, use_container_width=True)
+            mostrar_figura(fig)
         else:
             st.info("No hay datos suficientes para la gráfica")
 
 # Función para mostrar la gestión de miembros
+@instrumentar("pagina")
 def show_miembros_page():
     st.header("Gestión de Miembros")
     
-    tab1, tab2 = st.tabs(["Lista de Miembros", "Añadir/Editar Miembro"])
+    pestanas = ["Lista de Miembros", "Añadir/Editar Miembro"]
+    pestana = pestanas_perezosas(pestanas, key="pestana_miembros")
     
-    with tab1:
-        # Obtener todos los miembros
-        miembros = db.get_miembros()
+    if pestana == "Lista de Miembros":
+        # Padrón compartido de los miembros activos
+        padron = get_padron()
         
-        if miembros:
-            df_miembros = pd.DataFrame([{
-                "ID": m["id"],
-                "NIP": m["nip"],
-                "Nombre": m["nombre"],
-                "Apellidos": m["apellidos"],
-                "Sección": m["secciones"]["nombre"],
-                "Grupo": m["grupos"]["nombre"],
-                "Acciones": m["id"]
-            } for m in miembros])
+        if len(padron):
+            secciones = padron.secciones.indice()
+            grupos = padron.grupos.indice()
             
             # Filtros
             col1, col2, col3 = st.columns(3)
             with col1:
                 filtro_seccion = st.selectbox(
                     "Filtrar por Sección",
-                    ["Todos"] + list(df_miembros["Sección"].unique()),
+                    [None] + list(secciones),
+                    format_func=lambda x: "Todos" if x is None else secciones[x],
                     key="filtro_seccion_miembros"
                 )
             
             with col2:
                 filtro_grupo = st.selectbox(
                     "Filtrar por Grupo",
-                    ["Todos"] + list(df_miembros["Grupo"].unique()),
+                    [None] + list(grupos),
+                    format_func=lambda x: "Todos" if x is None else grupos[x],
                     key="filtro_grupo_miembros"
                 )
             
             with col3:
-                filtro_nombre = st.text_input("Buscar por nombre o apellido", key="filtro_nombre_miembros")
+                filtro_nombre = st.text_input("Buscar por nombre, apellido o NIP", key="filtro_nombre_miembros")
             
             # Aplicar filtros
-            df_filtrado = df_miembros.copy()
-            
-            if filtro_seccion != "Todos":
-                df_filtrado = df_filtrado[df_filtrado["Sección"] == filtro_seccion]
-            
-            if filtro_grupo != "Todos":
-                df_filtrado = df_filtrado[df_filtrado["Grupo"] == filtro_grupo]
-            
-            if filtro_nombre:
-                filtro_nombre = filtro_nombre.lower()
-                df_filtrado = df_filtrado[
-                    df_filtrado["Nombre"].str.lower().str.contains(filtro_nombre) |
-                    df_filtrado["Apellidos"].str.lower().str.contains(filtro_nombre)
-                ]
+            df_filtrado = padron.a_dataframe(padron.filtrar(filtro_seccion, filtro_grupo))
+            
+            # Búsqueda en el servidor, ya filtrada por sección y grupo; los textos muy cortos no lanzan consulta
+            filtro_nombre = " ".join(filtro_nombre.lower().split())
+            if len(filtro_nombre) >= BUSQUEDA_MIN_CARACTERES:
+                encontrados = db.buscar_miembros(filtro_nombre, filtro_seccion, filtro_grupo)
+                orden = {m["id"]: i for i, m in enumerate(encontrados)}
+                df_filtrado = df_filtrado[df_filtrado["ID"].isin(orden)].sort_values(
+                    "ID", key=lambda ids: ids.map(orden)
+                )
+            elif filtro_nombre:
+                st.caption(f"Escriba al menos {BUSQUEDA_MIN_CARACTERES} caracteres para buscar")
             
             # Mostrar la tabla
-            st.dataframe(df_filtrado.drop(columns=["ID", "Acciones"]), use_container_width=True)
+            st.dataframe(df_filtrado.drop(columns=["ID"]), use_container_width=True)
             
             # Selección para editar/eliminar
             col1, col2 = st.columns(2)
@@ -234,7 +287,7 @@ def show_miembros_page():
                 miembro_seleccionado = st.selectbox(
                     "Seleccionar miembro para editar/eliminar",
                     df_filtrado["ID"].tolist(),
-                    format_func=lambda x: f"{df_miembros[df_miembros['ID'] == x].iloc[0]['NIP']} - {df_miembros[df_miembros['ID'] == x].iloc[0]['Nombre']} {df_miembros[df_miembros['ID'] == x].iloc[0]['Apellidos']}"
+                    format_func=padron.etiqueta
                 )
             
             with col2:
@@ -242,8 +295,9 @@ def show_miembros_page():
                 
                 if st.button("Ejecutar"):
                     if accion == "Editar":
-                        # Guardar el ID del miembro para editar
+                        # Guardar el ID del miembro para editar y abrir el formulario
                         st.session_state.miembro_editar = miembro_seleccionado
+                        mostrar_pestana("pestana_miembros", "Añadir/Editar Miembro")
                         st.rerun()
                     else:  # Eliminar
                         db.delete_miembro(miembro_seleccionado)
@@ -252,19 +306,15 @@ def show_miembros_page():
         else:
             st.info("No hay miembros registrados")
     
-    with tab2:
+    if pestana == "Añadir/Editar Miembro":
         # Obtener secciones y grupos para los selectores
-        secciones = db.get_secciones()
-        grupos = db.get_grupos()
+        secciones = indice_por_id(db.get_secciones())
+        grupos = indice_por_id(db.get_grupos())
         
         # Verificar si estamos editando un miembro existente
         miembro_editar = None
         if hasattr(st.session_state, 'miembro_editar'):
-            miembro_id = st.session_state.miembro_editar
-            for m in miembros:
-                if m["id"] == miembro_id:
-                    miembro_editar = m
-                    break
+            miembro_editar = get_padron().miembro(st.session_state.miembro_editar)
         
         st.subheader("Añadir Nuevo Miembro" if not miembro_editar else "Editar Miembro")
         
@@ -288,16 +338,16 @@ def show_miembros_page():
             
             seccion_id = st.selectbox(
                 "Sección",
-                options=[s["id"] for s in secciones],
-                format_func=lambda x: next((s["nombre"] for s in secciones if s["id"] == x), ""),
-                index=next((i for i, s in enumerate(secciones) if s["id"] == miembro_editar["secciones"]["id"]), 0) if miembro_editar else 0
+                options=list(secciones),
+                format_func=secciones.__getitem__,
+                index=posicion(secciones, miembro_editar["secciones"]["id"]) if miembro_editar else 0
             )
             
             grupo_id = st.selectbox(
                 "Grupo",
-                options=[g["id"] for g in grupos],
-                format_func=lambda x: next((g["nombre"] for g in grupos if g["id"] == x), ""),
-                index=next((i for i, g in enumerate(grupos) if g["id"] == miembro_editar["grupos"]["id"]), 0) if miembro_editar else 0
+                options=list(grupos),
+                format_func=grupos.__getitem__,
+                index=posicion(grupos, miembro_editar["grupos"]["id"]) if miembro_editar else 0
             )
             
             submit_button = st.form_submit_button("Guardar")
@@ -307,9 +357,10 @@ def show_miembros_page():
                     # Actualizar miembro existente
                     db.update_miembro(miembro_editar["id"], nip, nombre, apellidos, seccion_id, grupo_id)
                     st.success("Miembro actualizado correctamente")
-                    # Limpiar la variable de sesión
+                    # Limpiar la variable de sesión y volver a la lista
                     if hasattr(st.session_state, 'miembro_editar'):
                         del st.session_state.miembro_editar
+                    mostrar_pestana("pestana_miembros", "Lista de Miembros")
                 else:
                     # Añadir nuevo miembro
                     db.add_miembro(nip, nombre, apellidos, seccion_id, grupo_id)
@@ -318,13 +369,74 @@ def show_miembros_page():
                 st.rerun()
 
 # Función para mostrar el formulario de agendar actividad
+@instrumentar("pagina")
 def show_agendar_actividad_page():
     st.header("Agendar Actividad")
     
     # Obtener datos necesarios
-    miembros = db.get_miembros()
-    actividades = db.get_actividades()
-    turnos = db.get_turnos()
+    padron = get_padron()
+    actividades = indice_por_id(db.get_actividades())
+    turnos = indice_por_id(db.get_turnos())
+    
+    # Resultado del último envío (se muestra tras el rerun)
+    if "agendar_resultado" in st.session_state:
+        insertados, conflictos = st.session_state.pop("agendar_resultado")
+        if insertados:
+            st.success(f"{len(insertados)} actividad(es) agendada(s) correctamente")
+        if conflictos:
+            st.warning(
+                "Ya tenían esta actividad agendada en la misma fecha y turno: "
+                + ", ".join(conflictos)
+            )
+    
+    # Envíos anotados en el diario local: los conflictos se conocen al guardarlos
+    if "agendar_diario" in st.session_state:
+        envio = st.session_state.agendar_diario
+        resultados = diario.resultados(envio)
+        pendientes = sum(resultado is None for resultado in resultados.values())
+        if pendientes:
+            st.info(f"{pendientes} actividad(es) pendiente(s) de guardar en la base de datos")
+        else:
+            del st.session_state.agendar_diario
+            duplicados = [envio[clave] for clave, resultado in resultados.items() if resultado == "duplicado"]
+            rechazados = [envio[clave] for clave, resultado in resultados.items() if resultado == "rechazado"]
+            desconocidos = [envio[clave] for clave, resultado in resultados.items() if resultado == "desconocido"]
+            if duplicados:
+                st.warning(
+                    "Ya tenían esta actividad agendada en la misma fecha y turno: "
+                    + ", ".join(duplicados)
+                )
+            if rechazados:
+                st.error("No se pudo guardar la actividad de: " + ", ".join(rechazados))
+            if desconocidos:
+                st.warning(
+                    "No se puede confirmar si se guardó la actividad de: "
+                    + ", ".join(desconocidos)
+                    + ". Compruébelo en el Registro de Actividades."
+                )
+    
+    # Filtros para miembros (fuera del formulario para que actualicen la lista)
+    secciones = padron.secciones.indice()
+    grupos = padron.grupos.indice()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        filtro_seccion = st.selectbox(
+            "Filtrar por Sección",
+            [None] + list(secciones),
+            format_func=lambda x: "Todos" if x is None else secciones[x]
+        )
+    
+    with col2:
+        filtro_grupo = st.selectbox(
+            "Filtrar por Grupo",
+            [None] + list(grupos),
+            format_func=lambda x: "Todos" if x is None else grupos[x]
+        )
+    
+    # Aplicar filtros
+    miembros_filtrados = padron.ids_en(padron.filtrar(filtro_seccion, filtro_grupo))
     
     # Formulario para agendar actividad
     with st.form("agendar_form"):
@@ -335,42 +447,26 @@ def show_agendar_actividad_page():
             
             turno_id = st.selectbox(
                 "Turno",
-                options=[t["id"] for t in turnos],
-                format_func=lambda x: next((t["nombre"] for t in turnos if t["id"] == x), "")
+                options=list(turnos),
+                format_func=turnos.__getitem__
             )
             
             actividad_id = st.selectbox(
                 "Actividad",
-                options=[a["id"] for a in actividades],
-                format_func=lambda x: next((a["nombre"] for a in actividades if a["id"] == x), "")
+                options=list(actividades),
+                format_func=actividades.__getitem__
             )
         
         with col2:
-            # Filtros para miembros
-            filtro_seccion = st.selectbox(
-                "Filtrar por Sección",
-                ["Todos"] + list(set([m["secciones"]["nombre"] for m in miembros]))
-            )
-            
-            filtro_grupo = st.selectbox(
-                "Filtrar por Grupo",
-                ["Todos"] + list(set([m["grupos"]["nombre"] for m in miembros]))
+            # Selector de miembros
+            miembro_ids = st.multiselect(
+                "Miembros",
+                options=miembros_filtrados,
+                format_func=padron.etiqueta
             )
             
-            # Aplicar filtros
-            miembros_filtrados = miembros.copy()
-            
-            if filtro_seccion != "Todos":
-                miembros_filtrados = [m for m in miembros_filtrados if m["secciones"]["nombre"] == filtro_seccion]
-            
-            if filtro_grupo != "Todos":
-                miembros_filtrados = [m for m in miembros_filtrados if m["grupos"]["nombre"] == filtro_grupo]
-            
-            # Selector de miembros
-            miembro_id = st.selectbox(
-                "Miembro",
-                options=[m["id"] for m in miembros_filtrados],
-                format_func=lambda x: next((f"{m['nip']} - {m['nombre']} {m['apellidos']}" for m in miembros_filtrados if m["id"] == x), "")
+            todos = st.checkbox(
+                f"Agendar a todos los miembros filtrados ({len(miembros_filtrados)})"
             )
         
         observaciones = st.text_area("Observaciones")
@@ -378,17 +474,35 @@ def show_agendar_actividad_page():
         submit_button = st.form_submit_button("Agendar Actividad")
         
         if submit_button:
-            # Guardar el registro
-            db.add_registro_actividad(
-                miembro_id=miembro_id,
-                actividad_id=actividad_id,
-                fecha=fecha.strftime("%Y-%m-%d"),
-                turno_id=turno_id,
-                monitor_id=st.session_state.usuario["id"],
-                observaciones=observaciones
+            datos = {
+                "actividad_id": actividad_id,
+                "fecha": fecha.strftime("%Y-%m-%d"),
+                "turno_id": turno_id,
+                "monitor_id": st.session_state.usuario["id"],
+                "observaciones": observaciones
+            }
+            
+            if todos:
+                miembro_ids = miembros_filtrados
+            elif not miembro_ids:
+                st.error("Seleccione al menos un miembro")
+                st.stop()
+            
+            if DIARIO_LOCAL:
+                # Se anotan en el diario local y se guardan en segundo plano
+                claves = db.anotar_registros_actividad(miembro_ids=miembro_ids, **datos)
+                insertados, conflictos = list(claves), []
+                st.session_state.agendar_diario = {
+                    clave: padron.etiqueta(miembro_id, str(miembro_id)) for clave, miembro_id in claves.items()
+                }
+            else:
+                # Guardar los registros en lotes
+                insertados, conflictos = db.add_registros_actividad(miembro_ids=miembro_ids, **datos)
+            
+            st.session_state.agendar_resultado = (
+                insertados,
+                [padron.etiqueta(miembro_id, str(miembro_id)) for miembro_id in conflictos]
             )
-            
-            st.success("Actividad agendada correctamente")
             st.rerun()
     
     # Mostrar actividades agendadas para el día
@@ -398,33 +512,32 @@ def show_agendar_actividad_page():
     fecha_fin = st.date_input("Fecha de fin", value=datetime.now() + timedelta(days=7))
     
     if fecha_inicio and fecha_fin:
-        actividades_agendadas = db.get_registro_actividades(
+        actividades_agendadas = actividad_reciente.get_registros(
             fecha_inicio=fecha_inicio.strftime("%Y-%m-%d"),
             fecha_fin=fecha_fin.strftime("%Y-%m-%d")
         )
         
         if actividades_agendadas:
-            df_agendadas = pd.DataFrame([{
-                "Fecha": a["fecha"],
-                "Miembro": f"{a['miembros']['nip']} - {a['miembros']['nombre']} {a['miembros']['apellidos']}",
-                "Actividad": a["actividades"]["nombre"],
-                "Turno": a["turnos"]["nombre"],
-                "Monitor": f"{a['monitores']['nombre']} {a['monitores']['apellidos']}",
-                "Observaciones": a["observaciones"] or ""
-            } for a in actividades_agendadas])
+            df_agendadas = registros_a_dataframe(actividades_agendadas)
+            df_agendadas["Miembro"] = (
+                df_agendadas["NIP"].astype(str) + " - " + df_agendadas["Miembro"].astype(str)
+            ).astype("category")
+            df_agendadas = df_agendadas[["Fecha", "Miembro", "Actividad", "Turno", "Monitor", "Observaciones"]]
             
             st.dataframe(df_agendadas, use_container_width=True)
         else:
             st.info("No hay actividades agendadas para el período seleccionado")
 
 # Función para mostrar el registro de actividades
+@instrumentar("pagina")
 def show_registro_actividades_page():
     st.header("Registro de Actividades")
     
     # Obtener datos necesarios
-    miembros = db.get_miembros()
-    actividades = db.get_actividades()
-    turnos = db.get_turnos()
+    actividades = indice_por_id(db.get_actividades())
+    turnos = indice_por_id(db.get_turnos())
+    secciones = indice_por_id(db.get_secciones())
+    grupos = indice_por_id(db.get_grupos())
     
     # Filtros
     col1, col2, col3 = st.columns(3)
@@ -438,7 +551,8 @@ def show_registro_actividades_page():
     with col3:
         filtro_actividad = st.selectbox(
             "Filtrar por Actividad",
-            ["Todas"] + [a["nombre"] for a in actividades],
+            [None] + list(actividades),
+            format_func=lambda x: "Todas" if x is None else actividades[x],
             key="filtro_actividad_registro"
         )
     
@@ -448,83 +562,101 @@ def show_registro_actividades_page():
     with col1:
         filtro_turno = st.selectbox(
             "Filtrar por Turno",
-            ["Todos"] + [t["nombre"] for t in turnos],
+            [None] + list(turnos),
+            format_func=lambda x: "Todos" if x is None else turnos[x],
             key="filtro_turno_registro"
         )
     
     with col2:
         filtro_seccion = st.selectbox(
             "Filtrar por Sección",
-            ["Todas"] + list(set([m["secciones"]["nombre"] for m in miembros])),
+            [None] + list(secciones),
+            format_func=lambda x: "Todas" if x is None else secciones[x],
             key="filtro_seccion_registro"
         )
     
     with col3:
         filtro_grupo = st.selectbox(
             "Filtrar por Grupo",
-            ["Todos"] + list(set([m["grupos"]["nombre"] for m in miembros])),
+            [None] + list(grupos),
+            format_func=lambda x: "Todos" if x is None else grupos[x],
             key="filtro_grupo_registro"
         )
     
-    # Obtener registros
-    registros = db.get_registro_actividades(
-        fecha_inicio=fecha_inicio.strftime("%Y-%m-%d"),
-        fecha_fin=fecha_fin.strftime("%Y-%m-%d")
-    )
+    # Obtener registros página a página; se cargan más bajo demanda.
+    # Los filtros se aplican en el servidor.
+    filtros = {
+        "fecha_inicio": fecha_inicio.strftime("%Y-%m-%d"),
+        "fecha_fin": fecha_fin.strftime("%Y-%m-%d"),
+        "actividad_id": filtro_actividad,
+        "turno_id": filtro_turno,
+        "seccion_id": filtro_seccion,
+        "grupo_id": filtro_grupo
+    }
+    # Las filas cargadas y el último registro se guardan en la sesión: cada
+    # "Cargar más registros" pide solo la página siguiente a ese registro
+    if st.session_state.get("registro_filtros") != filtros:
+        st.session_state.registro_filtros = filtros
+        st.session_state.registro_filas = []
+        st.session_state.registro_hay_mas = True
+        st.session_state.pop("registro_exportacion", None)
+    
+    def cargar_pagina():
+        filas = st.session_state.registro_filas
+        desde = filas[-1] if filas else None
+        pagina = next(db.iter_registro_actividades(**filtros, desde=desde), [])
+        st.session_state.registro_filas = filas + pagina
+        st.session_state.registro_hay_mas = len(pagina) == REGISTRO_TAMANO_PAGINA
+    
+    if not st.session_state.registro_filas and st.session_state.registro_hay_mas:
+        cargar_pagina()
+    
+    registros = st.session_state.registro_filas
     
     if registros:
-        df_registros = pd.DataFrame([{
-            "ID": r["id"],
-            "Fecha": r["fecha"],
-            "NIP": r["miembros"]["nip"],
-            "Miembro": f"{r['miembros']['nombre']} {r['miembros']['apellidos']}",
-            "Actividad": r["actividades"]["nombre"],
-            "Turno": r["turnos"]["nombre"],
-            "Monitor": f"{r['monitores']['nombre']} {r['monitores']['apellidos']}",
-            "Observaciones": r["observaciones"] or ""
-        } for r in registros])
-        
-        # Aplicar filtros adicionales
-        if filtro_actividad != "Todas":
-            df_registros = df_registros[df_registros["Actividad"] == filtro_actividad]
-        
-        if filtro_turno != "Todos":
-            df_registros = df_registros[df_registros["Turno"] == filtro_turno]
-        
-        # Filtros de sección y grupo requieren unir con los datos de miembros
-        if filtro_seccion != "Todas" or filtro_grupo != "Todos":
-            df_miembros = pd.DataFrame([{
-                "NIP": m["nip"],
-                "Seccion": m["secciones"]["nombre"],
-                "Grupo": m["grupos"]["nombre"]
-            } for m in miembros])
-            
-            df_registros = df_registros.merge(df_miembros, on="NIP", how="left")
-            
-            if filtro_seccion != "Todas":
-                df_registros = df_registros[df_registros["Seccion"] == filtro_seccion]
-            
-            if filtro_grupo != "Todos":
-                df_registros = df_registros[df_registros["Grupo"] == filtro_grupo]
-            
-            # Eliminar columnas adicionales
-            df_registros = df_registros.drop(columns=["Seccion", "Grupo"])
+        df_registros = registros_a_dataframe(registros)
         
         # Mostrar resultados
         st.dataframe(df_registros.drop(columns=["ID"]), use_container_width=True)
         
-        # Descargar datos
-        csv = df_registros.drop(columns=["ID"]).to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Descargar como CSV",
-            data=csv,
-            file_name=f"registro_actividades_{fecha_inicio}_a_{fecha_fin}.csv",
-            mime="text/csv"
-        )
+        if st.session_state.registro_hay_mas and st.button("Cargar más registros"):
+            cargar_pagina()
+            st.rerun()
+        
+        # Exportar todos los registros filtrados (no solo los cargados), página a página
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            formato = st.selectbox(
+                "Formato de exportación",
+                list(FORMATOS),
+                format_func={"csv": "CSV comprimido (.csv.gz)", "parquet": "Parquet"}.__getitem__,
+                key="formato_exportacion_registro"
+            )
+        
+        with col2:
+            if st.button("Preparar exportación"):
+                with st.spinner("Exportando registros..."):
+                    paginas_exportacion = db.iter_registro_actividades(
+                        **filtros, tamano_pagina=EXPORTACION_TAMANO_PAGINA
+                    )
+                    st.session_state.registro_exportacion = (formato, exportar(paginas_exportacion, formato))
+        
+        # La exportación se descarta al cambiar los filtros; solo se ofrece si es del formato actual
+        exportacion = st.session_state.get("registro_exportacion")
+        if exportacion and exportacion[0] == formato:
+            extension, mime = FORMATOS[formato]
+            st.download_button(
+                label="Descargar exportación",
+                data=exportacion[1],
+                file_name=f"registro_actividades_{fecha_inicio}_a_{fecha_fin}{extension}",
+                mime=mime
+            )
     else:
         st.info("No hay registros para el período y filtros seleccionados")
 
 # Función para mostrar estadísticas
+@instrumentar("pagina")
 def show_estadisticas_page():
     st.header("Estadísticas")
     
@@ -537,74 +669,79 @@ def show_estadisticas_page():
     with col2:
         fecha_fin = st.date_input("Fecha de fin", value=datetime.now())
     
-    # Obtener datos para las estadísticas
-    est_seccion = db.get_estadisticas_actividades_por_seccion(
-        fecha_inicio=fecha_inicio.strftime("%Y-%m-%d"),
-        fecha_fin=fecha_fin.strftime("%Y-%m-%d")
-    )
-    
-    est_grupo = db.get_estadisticas_actividades_por_grupo(
-        fecha_inicio=fecha_inicio.strftime("%Y-%m-%d"),
-        fecha_fin=fecha_fin.strftime("%Y-%m-%d")
-    )
+    periodo = {
+        "fecha_inicio": fecha_inicio.strftime("%Y-%m-%d"),
+        "fecha_fin": fecha_fin.strftime("%Y-%m-%d")
+    }
     
-    sin_actividades = db.get_estadisticas_miembros_sin_actividades(
-        fecha_inicio=fecha_inicio.strftime("%Y-%m-%d"),
-        fecha_fin=fecha_fin.strftime("%Y-%m-%d")
+    # Solo se consultan los datos de la pestaña activa
+    pestana = pestanas_perezosas(
+        ["Por Sección", "Por Grupo", "Miembros sin Actividades"], key="pestana_estadisticas"
     )
     
-    # Mostrar gráficas
-    tab1, tab2, tab3 = st.tabs(["Por Sección", "Por Grupo", "Miembros sin Actividades"])
-    
-    with tab1:
+    if pestana == "Por Sección":
+        est_seccion = db.get_estadisticas_actividades_por_seccion(**periodo)
+        
         if not est_seccion.empty:
             # Gráfica de barras
-            fig_bar = px.bar(
+            fig_bar = figura(
+                px.bar,
                 est_seccion,
+                "estadisticas_seccion_barras",
                 x="seccion",
                 y="total",
                 color="actividad",
                 title="Actividades por Sección",
                 labels={"seccion": "Sección", "total": "Total de Actividades", "actividad": "Tipo de Actividad"}
             )
-            st.plotly_chart(fig_bar, use_container_width=True)
+            mostrar_figura(fig_bar)
             
             # Gráfica de pastel
-            fig_pie = px.pie(
+            fig_pie = figura(
+                px.pie,
                 est_seccion,
+                "estadisticas_seccion_pastel",
                 values="total",
                 names="seccion",
                 title="Distribución de Actividades por Sección"
             )
-            st.plotly_chart(fig_pie, use_container_width=True)
+            mostrar_figura(fig_pie)
         else:
             st.info("No hay datos suficientes para las gráficas")
     
-    with tab2:
+    if pestana == "Por Grupo":
+        est_grupo = db.get_estadisticas_actividades_por_grupo(**periodo)
+        
         if not est_grupo.empty:
             # Gráfica de barras
-            fig_bar = px.bar(
+            fig_bar = figura(
+                px.bar,
                 est_grupo,
+                "estadisticas_grupo_barras",
                 x="grupo",
                 y="total",
                 color="actividad",
                 title="Actividades por Grupo",
                 labels={"grupo": "Grupo", "total": "Total de Actividades", "actividad": "Tipo de Actividad"}
             )
-            st.plotly_chart(fig_bar, use_container_width=True)
+            mostrar_figura(fig_bar)
             
             # Gráfica de pastel
-            fig_pie = px.pie(
+            fig_pie = figura(
+                px.pie,
                 est_grupo,
+                "estadisticas_grupo_pastel",
                 values="total",
                 names="grupo",
                 title="Distribución de Actividades por Grupo"
             )
-            st.plotly_chart(fig_pie, use_container_width=True)
+            mostrar_figura(fig_pie)
         else:
             st.info("No hay datos suficientes para las gráficas")
     
-    with tab3:
+    if pestana == "Miembros sin Actividades":
+        sin_actividades = db.get_estadisticas_miembros_sin_actividades(**periodo)
+        
         if not sin_actividades.empty:
             st.subheader(f"Miembros sin Actividades ({len(sin_actividades)})")
             
@@ -636,25 +773,151 @@ def show_estadisticas_page():
             st.dataframe(df_filtrado[["nip", "nombre", "apellidos", "seccion", "grupo"]], use_container_width=True)
             
             # Gráfica de miembros sin actividades por sección y grupo
-            fig = px.bar(
+            fig = figura(
+                px.bar,
                 df_filtrado.groupby(["seccion", "grupo"]).size().reset_index(name="total"),
+                "estadisticas_sin_actividades",
                 x="seccion",
                 y="total",
                 color="grupo",
                 title="Miembros sin Actividades por Sección y Grupo",
                 labels={"seccion": "Sección", "total": "Total de Miembros", "grupo": "Grupo"}
             )
-            st.plotly_chart(fig, use_container_width=True)
+            mostrar_figura(fig)
         else:
             st.success("¡Todos los miembros han realizado actividades en el período seleccionado!")
 
+# Función para mostrar tendencias, retención y rachas
+@instrumentar("pagina")
+def show_tendencias_page():
+    st.header("Tendencias")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        fecha_inicio = st.date_input(
+            "Fecha de inicio", value=datetime.now() - timedelta(days=365), key="inicio_tendencias"
+        )
+    
+    with col2:
+        fecha_fin = st.date_input("Fecha de fin", value=datetime.now(), key="fin_tendencias")
+    
+    with col3:
+        frecuencia = st.radio(
+            "Frecuencia",
+            list(analitica.FRECUENCIAS),
+            format_func=analitica.FRECUENCIAS.__getitem__,
+            horizontal=True,
+            key="frecuencia_tendencias"
+        )
+    
+    # Un registro por fila como enteros (miembro, día, actividad, turno, sección)
+    inicio = fecha_inicio.strftime("%Y-%m-%d")
+    marco = db.get_registro_compacto(inicio, fecha_fin.strftime("%Y-%m-%d"))
+    
+    if marco.empty:
+        st.info("No hay registros en el período seleccionado")
+        return
+    
+    unidad = "semanas" if frecuencia == "W" else "meses"
+    pestana = pestanas_perezosas(["Asistencia", "Retención", "Rachas"], key="pestana_tendencias")
+    
+    if pestana == "Asistencia":
+        dimension = st.selectbox(
+            "Desglosar por",
+            list(analitica.DIMENSIONES),
+            format_func=analitica.DIMENSIONES.__getitem__,
+            key="dimension_tendencias"
+        )
+        
+        # Solo se consultan los nombres de la dimensión elegida
+        nombres = indice_por_id({
+            "actividad": db.get_actividades,
+            "turno": db.get_turnos,
+            "seccion": db.get_secciones
+        }[dimension]())
+        etiqueta = analitica.DIMENSIONES[dimension]
+        
+        serie = analitica.serie_asistencia(marco, inicio, frecuencia, dimension)
+        df_serie = (
+            serie.rename(columns=lambda valor: nombres.get(valor, f"#{valor}"))
+            .rename_axis("periodo")
+            .reset_index()
+            .melt(id_vars="periodo", var_name=etiqueta, value_name="registros")
+        )
+        
+        fig = figura(
+            px.line,
+            df_serie,
+            "tendencias_asistencia",
+            x="periodo",
+            y="registros",
+            color=etiqueta,
+            title=f"Asistencia por {etiqueta.lower()} ({analitica.FRECUENCIAS[frecuencia].lower()})",
+            labels={"periodo": "Período", "registros": "Actividades"}
+        )
+        mostrar_figura(fig)
+    
+    if pestana == "Retención":
+        st.caption(
+            "Cada cohorte agrupa a los miembros por el período de su primera actividad dentro del rango "
+            f"seleccionado; las columnas indican cuántos {unidad} después siguen acudiendo."
+        )
+        
+        retencion = analitica.cohortes_retencion(marco, inicio, frecuencia)
+        retencion.index = retencion.index.strftime("%Y-%m-%d" if frecuencia == "W" else "%Y-%m")
+        
+        fig = figura(
+            px.imshow,
+            retencion,
+            "tendencias_retencion",
+            text_auto=".0%",
+            aspect="auto",
+            color_continuous_scale="Blues",
+            title="Retención por cohorte",
+            labels={"x": f"{unidad.capitalize()} desde la primera actividad", "y": "Cohorte", "color": "Retención"}
+        )
+        mostrar_figura(fig)
+    
+    if pestana == "Rachas":
+        df_rachas = analitica.rachas(marco, inicio, frecuencia)
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Miembros con actividad", len(df_rachas))
+        col2.metric(f"Racha máxima ({unidad})", int(df_rachas["racha_maxima"].max()))
+        col3.metric("Miembros con racha activa", int((df_rachas["racha_actual"] > 0).sum()))
+        
+        fig = figura(
+            px.histogram,
+            df_rachas,
+            "tendencias_rachas",
+            x="racha_maxima",
+            title="Distribución de la racha máxima",
+            labels={"racha_maxima": f"Racha máxima ({unidad} consecutivos)"}
+        )
+        mostrar_figura(fig)
+        
+        # Mejores rachas actuales
+        padron = get_padron()
+        mejores = df_rachas.nlargest(20, ["racha_actual", "racha_maxima"])
+        st.subheader("Rachas activas más largas")
+        st.dataframe(
+            pd.DataFrame({
+                "Miembro": [padron.etiqueta(miembro_id, f"#{miembro_id}") for miembro_id in mejores.index],
+                f"Racha actual ({unidad})": mejores["racha_actual"].to_numpy(),
+                f"Racha máxima ({unidad})": mejores["racha_maxima"].to_numpy()
+            }),
+            use_container_width=True
+        )
+
 # Función para mostrar configuración
+@instrumentar("pagina")
 def show_configuracion_page():
     st.header("Configuración")
     
-    tab1, tab2 = st.tabs(["Actividades", "Monitores"])
+    pestana = pestanas_perezosas(["Actividades", "Monitores"], key="pestana_configuracion")
     
-    with tab1:
+    if pestana == "Actividades":
         st.subheader("Gestión de Actividades")
         
         # Lista de actividades
@@ -685,16 +948,22 @@ def show_configuracion_page():
                 st.success("Actividad añadida correctamente")
                 st.rerun()
     
-    with tab2:
+    if pestana == "Monitores":
         st.subheader("Gestión de Monitores")
         st.info("Funcionalidad en desarrollo...")
 
 # Función principal
 def main():
-    if not st.session_state.logged_in:
-        show_login()
-    else:
-        show_dashboard()
+    memo.iniciar_ejecucion()
+    
+    # También si la ejecución acaba con st.rerun() o una excepción
+    try:
+        if not st.session_state.logged_in:
+            show_login()
+        else:
+            show_dashboard()
+    finally:
+        memo.terminar_ejecucion()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,127 @@
+"""Benchmark del arranque: tiempo hasta mostrar la página de login en un proceso nuevo.
+
+Cada medición se hace en un intérprete nuevo (como tras un despliegue o el reinicio
+de un pod), con AppTest y sin conexión con Supabase:
+
+    python -m benchmarks.arranque --salida base.json
+    python -m benchmarks.arranque --comparar base.json --fallar
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Módulos pesados que la página de login no necesita
+_MODULOS_PESADOS = ["supabase", "httpx", "postgrest", "plotly.express"]
+
+def _medir_en_este_proceso():
+    """Mide el arranque en el proceso actual (recién creado) y escribe el resultado en JSON"""
+    inicio = time.perf_counter()
+    # El servidor de Streamlit ya lo tiene importado antes de la primera sesión
+    from streamlit.testing.v1 import AppTest
+    importar_streamlit = time.perf_counter() - inicio
+
+    from benchmarks import entorno
+    entorno.preparar_importaciones()
+    at = AppTest.from_file(os.path.join(entorno.RAIZ, "app.py"), default_timeout=120)
+    # Como en un despliegue, con las credenciales en los secretos (sin fichero, st.secrets muestra un error)
+    for nombre in ("SUPABASE_URL", "SUPABASE_KEY"):
+        at.secrets[nombre] = os.environ[nombre]
+
+    inicio = time.perf_counter()
+    at.run()
+    primera = time.perf_counter() - inicio
+    if at.exception or not at.title or at.title[0].value != "Acceso al Sistema":
+        raise RuntimeError(f"La página de login no se ha mostrado: {[e.value for e in at.exception]}")
+
+    # Una segunda ejecución de la misma sesión (módulos ya importados)
+    inicio = time.perf_counter()
+    at.run()
+    segunda = time.perf_counter() - inicio
+
+    json.dump({
+        "tiempos": {
+            "arranque.importar_streamlit": importar_streamlit * 1000,
+            "arranque.login_primera_ejecucion": primera * 1000,
+            "arranque.login_segunda_ejecucion": segunda * 1000
+        },
+        "importados": {modulo: modulo in sys.modules for modulo in _MODULOS_PESADOS}
+    }, sys.stdout)
+
+def medir(repeticiones):
+    """Lanza un proceso nuevo por repetición; devuelve tiempos (ms) por escenario y módulos importados"""
+    from benchmarks import entorno
+    tiempos = {}
+    importados = {}
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, "-m", "benchmarks.arranque", "--hijo"],
+            cwd=entorno.RAIZ, capture_output=True, text=True, check=True
+        )
+        medicion = json.loads(proceso.stdout.strip().splitlines()[-1])
+        for nombre, valor in medicion["tiempos"].items():
+            tiempos.setdefault(nombre, []).append(valor)
+        importados = medicion["importados"]
+
+    resultados = {}
+    for nombre, valores in tiempos.items():
+        resultados[nombre] = {
+            "mediana_ms": round(statistics.median(valores), 2),
+            "min_ms": round(min(valores), 2),
+            "max_ms": round(max(valores), 2)
+        }
+        print(f"{nombre:<50} {resultados[nombre]['mediana_ms']:>8.1f} ms", flush=True)
+    print("Importados al mostrar el login: " + ", ".join(
+        f"{modulo} {'sí' if importado else 'no'}" for modulo, importado in importados.items()
+    ))
+    return resultados, importados
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", help="fichero JSON donde guardar el informe")
+    parser.add_argument("--comparar", help="informe JSON anterior con el que comparar")
+    parser.add_argument("--umbral", type=float, default=0.2, help="empeoramiento relativo tolerado (0.2 = 20%%)")
+    parser.add_argument("--fallar", action="store_true", help="salir con código 1 si hay regresiones")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argumentos)
+
+    if args.hijo:
+        _medir_en_este_proceso()
+        return 0
+
+    # Solo en el proceso que lanza las mediciones: no deben contar en el arranque
+    from benchmarks.rendimiento import comparar, _commit
+
+    resultados, importados = medir(args.repeticiones)
+    informe = {
+        "metadatos": {
+            "repeticiones": args.repeticiones,
+            "importados": importados,
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "resultados": resultados
+    }
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"\nInforme guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(json.load(f), informe, args.umbral)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones por encima del {args.umbral:.0%}")
+            if args.fallar:
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Prueba de carga: varias sesiones simultáneas de la aplicación contra el Supabase en memoria.
+
+Cada sesión es un AppTest (Streamlit sin navegador) en su propio hilo: muestra la
+página de login, inicia sesión y recorre todas las páginas del menú lateral. Todas
+comparten el proceso, como las sesiones de un servidor de Streamlit, así que las
+cachés, el padrón y el registro reciente son comunes:
+
+    python -m benchmarks.carga --sesiones 20 --vueltas 3 --escala media
+    python -m benchmarks.carga --sesiones 50 --latencia-ms 20 --salida carga.json
+    python -m benchmarks.carga --sesiones 50 --latencia-ms 20 --comparar carga.json --fallar
+
+Por página informa de los percentiles 50, 95 y 99 de la duración de cada ejecución
+del script y de las peticiones a Supabase por ejecución. Solo se navega: los
+formularios no se envían, para no modificar los datos entre sesiones.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+import numpy as np
+
+from benchmarks import datos_sinteticos, entorno
+from benchmarks.rendimiento import comparar, _commit
+from benchmarks.supabase_falso import SupabaseFalso
+
+class _ContadorPeticiones:
+    """Cuenta las peticiones a Supabase de cada sesión (también las de los hilos de consultas)"""
+
+    def __init__(self, cliente):
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        self._por_sesion = defaultdict(int)
+        self._lock = threading.Lock()
+        peticion = cliente._peticion
+
+        def contar(clave):
+            ctx = get_script_run_ctx(suppress_warning=True)
+            if ctx is not None:
+                with self._lock:
+                    self._por_sesion[id(ctx.session_state._state)] += 1
+            return peticion(clave)
+
+        cliente._peticion = contar
+
+    def total(self, at):
+        with self._lock:
+            return self._por_sesion[id(at.session_state._state)]
+
+def _sesion(vueltas, barrera, contador, mediciones, errores):
+    """Una sesión: login, inicio de sesión y todas las páginas del menú, vueltas veces"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(entorno.RAIZ, "app.py"), default_timeout=300)
+
+    def ejecutar(pagina):
+        antes = contador.total(at)
+        inicio = time.perf_counter()
+        at.run()
+        duracion = time.perf_counter() - inicio
+        mediciones.append((pagina, duracion * 1000, contador.total(at) - antes, bool(at.exception)))
+        if at.exception:
+            errores.append(f"{pagina}: {at.exception[0].value}")
+
+    try:
+        # Todas las sesiones llegan a la vez, como al abrir la matrícula
+        barrera.wait()
+        ejecutar("login")
+
+        at.text_input[0].input(datos_sinteticos.EMAIL_MONITOR)
+        at.text_input[1].input(datos_sinteticos.PASSWORD_MONITOR)
+        at.button[0].click()
+        ejecutar("login.enviar")
+        if not at.session_state["logged_in"]:
+            raise RuntimeError("No se ha podido iniciar sesión")
+
+        paginas = list(at.sidebar.radio[0].options)
+        for _ in range(vueltas):
+            for pagina in paginas:
+                at.sidebar.radio[0].set_value(pagina)
+                ejecutar(pagina)
+    except Exception:
+        errores.append(traceback.format_exc())
+
+def _percentil(valores, q):
+    return round(float(np.percentile(valores, q)), 2)
+
+def medir(cliente, sesiones, vueltas):
+    """Lanza las sesiones en hilos; devuelve estadísticas por página, duración total y errores"""
+    contador = _ContadorPeticiones(cliente)
+    barrera = threading.Barrier(sesiones)
+    mediciones = []
+    errores = []
+    hilos = [
+        threading.Thread(target=_sesion, args=(vueltas, barrera, contador, mediciones, errores), name=f"sesion-{i}")
+        for i in range(sesiones)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    por_pagina = defaultdict(list)
+    for pagina, ms, peticiones, error in mediciones:
+        por_pagina[pagina].append((ms, peticiones, error))
+    por_pagina["total"] = [medicion[1:] for medicion in mediciones]
+
+    resultados = {}
+    print(f"\n{'página':<30} {'ejecuciones':>11} {'p50':>9} {'p95':>9} {'p99':>9} {'peticiones':>11} {'errores':>8}")
+    for pagina, valores in por_pagina.items():
+        tiempos = [ms for ms, _, _ in valores]
+        resultado = resultados[f"carga.{pagina}"] = {
+            "ejecuciones": len(valores),
+            "mediana_ms": _percentil(tiempos, 50),
+            "p95_ms": _percentil(tiempos, 95),
+            "p99_ms": _percentil(tiempos, 99),
+            "max_ms": round(max(tiempos), 2),
+            "peticiones_por_ejecucion": round(sum(p for _, p, _ in valores) / len(valores), 2),
+            "errores": sum(error for _, _, error in valores)
+        }
+        print(
+            f"{pagina:<30} {resultado['ejecuciones']:>11} {resultado['mediana_ms']:>7.0f}ms "
+            f"{resultado['p95_ms']:>7.0f}ms {resultado['p99_ms']:>7.0f}ms "
+            f"{resultado['peticiones_por_ejecucion']:>11.1f} {resultado['errores']:>8}"
+        )
+    print(f"\n{len(mediciones)} ejecuciones en {duracion:.1f}s ({len(mediciones) / duracion:.1f} por segundo)")
+    return resultados, duracion, errores
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sesiones", type=int, default=10, help="sesiones simultáneas")
+    parser.add_argument("--vueltas", type=int, default=2, help="recorridos de todas las páginas por sesión")
+    parser.add_argument("--escala", choices=datos_sinteticos.ESCALAS, default="pequena")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="latencia simulada por petición")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="fichero JSON donde guardar el informe")
+    parser.add_argument("--comparar", help="informe JSON anterior con el que comparar (por la mediana)")
+    parser.add_argument("--umbral", type=float, default=0.2, help="empeoramiento relativo tolerado (0.2 = 20%%)")
+    parser.add_argument("--fallar", action="store_true", help="salir con código 1 si hay regresiones o errores")
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    tablas = datos_sinteticos.generar_escala(args.escala, semilla=args.semilla)
+    print(f"Datos '{args.escala}' generados en {time.perf_counter() - inicio:.1f}s", flush=True)
+
+    cliente = SupabaseFalso(tablas, latencia=args.latencia_ms / 1000)
+    entorno.preparar(cliente)
+    entorno.preparar_apptest()
+
+    print(f"{args.sesiones} sesiones, {args.vueltas} vuelta(s) por todas las páginas", flush=True)
+    resultados, duracion, errores = medir(cliente, args.sesiones, args.vueltas)
+    for error in errores[:5]:
+        print(f"\nError: {error}")
+
+    informe = {
+        "metadatos": {
+            "escala": args.escala,
+            "miembros": len(tablas["miembros"]),
+            "registros": len(tablas["registro_actividades"]),
+            "sesiones": args.sesiones,
+            "vueltas": args.vueltas,
+            "latencia_ms": args.latencia_ms,
+            "semilla": args.semilla,
+            "duracion_s": round(duracion, 2),
+            "errores": len(errores),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "resultados": resultados
+    }
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"\nInforme guardado en {args.salida}")
+
+    regresiones = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(json.load(f), informe, args.umbral)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones por encima del {args.umbral:.0%}")
+    if args.fallar and (regresiones or errores):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
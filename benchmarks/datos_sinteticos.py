@@ -0,0 +1,125 @@
+"""Datos sintéticos y reproducibles con el esquema de la base de datos del gimnasio."""
+import hashlib
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Tamaños predefinidos: miembros y registros de actividad
+ESCALAS = {
+    "pequena": {"miembros": 500, "registros": 20_000},
+    "media": {"miembros": 5_000, "registros": 200_000},
+    "grande": {"miembros": 50_000, "registros": 2_000_000}
+}
+
+# Credenciales del monitor de pruebas
+EMAIL_MONITOR = "monitor1@gimnasio.test"
+PASSWORD_MONITOR = "benchmark"
+
+_NOMBRES = [
+    "Ana", "Carlos", "Lucía", "Javier", "María", "Pablo", "Laura", "David", "Sara", "Miguel",
+    "Elena", "Jorge", "Paula", "Sergio", "Marta", "Daniel", "Carmen", "Alberto", "Irene", "Raúl"
+]
+_APELLIDOS = [
+    "García", "Fernández", "González", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez",
+    "Gómez", "Martín", "Jiménez", "Ruiz", "Hernández", "Díaz", "Moreno", "Álvarez", "Muñoz",
+    "Romero", "Alonso", "Gutiérrez"
+]
+_ACTIVIDADES = [
+    "Natación", "Carrera", "Pesas", "Circuito", "Bicicleta", "Yoga", "Boxeo", "Crossfit",
+    "Pilates", "Remo", "Escalada", "Spinning"
+]
+_TURNOS = ["Mañana", "Mediodía", "Tarde", "Noche"]
+
+def generar(miembros=500, registros=20_000, secciones=8, grupos=24, monitores=10,
+            dias=730, fin=date(2026, 10, 16), semilla=42):
+    """Genera las tablas como DataFrames; misma semilla, mismos datos"""
+    rng = np.random.default_rng(semilla)
+
+    tablas = {
+        "secciones": pd.DataFrame({
+            "id": np.arange(1, secciones + 1),
+            "nombre": [f"Sección {i}" for i in range(1, secciones + 1)]
+        }),
+        "grupos": pd.DataFrame({
+            "id": np.arange(1, grupos + 1),
+            "nombre": [f"Grupo {i}" for i in range(1, grupos + 1)]
+        }),
+        "actividades": pd.DataFrame({
+            "id": np.arange(1, len(_ACTIVIDADES) + 1),
+            "nombre": _ACTIVIDADES,
+            "descripcion": [f"Actividad de {nombre.lower()}" for nombre in _ACTIVIDADES],
+            "activo": True
+        }),
+        "turnos": pd.DataFrame({
+            "id": np.arange(1, len(_TURNOS) + 1),
+            "nombre": _TURNOS
+        }),
+        "monitores": pd.DataFrame({
+            "id": np.arange(1, monitores + 1),
+            "nombre": rng.choice(_NOMBRES, monitores),
+            "apellidos": rng.choice(_APELLIDOS, monitores),
+            "email": [f"monitor{i}@gimnasio.test" for i in range(1, monitores + 1)],
+            "contrasena": hashlib.sha256(PASSWORD_MONITOR.encode()).hexdigest()
+        })
+    }
+
+    nombres = rng.choice(_NOMBRES, miembros)
+    apellidos = (
+        pd.Series(rng.choice(_APELLIDOS, miembros)) + " " + pd.Series(rng.choice(_APELLIDOS, miembros))
+    )
+    tablas["miembros"] = pd.DataFrame({
+        "id": np.arange(1, miembros + 1),
+        "nip": rng.choice(np.arange(100_000, 1_000_000), miembros, replace=False),
+        "nombre": nombres,
+        "apellidos": apellidos,
+        "seccion_id": rng.integers(1, secciones + 1, miembros),
+        "grupo_id": rng.integers(1, grupos + 1, miembros),
+        # Un 5% de bajas
+        "activo": rng.random(miembros) >= 0.05
+    })
+
+    # Claves (miembro, actividad, fecha, turno) únicas, como exige la migración.
+    # La actividad de los miembros sigue una distribución sesgada: unos pocos entrenan mucho.
+    pesos = rng.pareto(1.5, miembros) + 1
+    pesos /= pesos.sum()
+    inicio = np.datetime64(fin) - np.timedelta64(dias - 1, "D")
+    generados = 0
+    partes = []
+    while generados < registros:
+        cantidad = int((registros - generados) * 1.1) + 100
+        parte = pd.DataFrame({
+            "miembro_id": rng.choice(tablas["miembros"]["id"].to_numpy(), cantidad, p=pesos),
+            "actividad_id": rng.integers(1, len(_ACTIVIDADES) + 1, cantidad),
+            "fecha": inicio + rng.integers(0, dias, cantidad).astype("timedelta64[D]"),
+            "turno_id": rng.integers(1, len(_TURNOS) + 1, cantidad)
+        })
+        partes.append(parte)
+        unicos = pd.concat(partes).drop_duplicates(["miembro_id", "actividad_id", "fecha", "turno_id"])
+        partes = [unicos]
+        generados = len(unicos)
+
+    registro = partes[0].head(registros).sort_values(["fecha", "turno_id"], kind="mergesort")
+    registro.insert(0, "id", np.arange(1, len(registro) + 1))
+    registro["fecha"] = registro["fecha"].astype("datetime64[ns]")
+    registro["monitor_id"] = rng.integers(1, monitores + 1, len(registro))
+    registro["observaciones"] = np.where(rng.random(len(registro)) < 0.1, "Buen rendimiento", None)
+    registro["clave_idempotencia"] = None
+    tablas["registro_actividades"] = registro.reset_index(drop=True)
+
+    # Columna mantenida por disparadores (migración de ultima_actividad)
+    ultima = registro.groupby("miembro_id")["fecha"].max()
+    tablas["miembros"]["ultima_actividad"] = tablas["miembros"]["id"].map(ultima)
+
+    # Marca de modificación (migración de la réplica): cada registro, el día de su fecha;
+    # el resto de tablas, al final del período
+    registro["updated_at"] = registro["fecha"].dt.tz_localize("UTC")
+    for nombre, tabla in tablas.items():
+        if "updated_at" not in tabla:
+            tabla["updated_at"] = pd.Timestamp(fin, tz="UTC")
+
+    return tablas
+
+def generar_escala(escala, semilla=42):
+    """Genera los datos de una de las escalas predefinidas"""
+    return generar(**ESCALAS[escala], semilla=semilla)
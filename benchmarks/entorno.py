@@ -0,0 +1,97 @@
+"""Carga los módulos de la aplicación contra el Supabase en memoria."""
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+from streamlit import config as streamlit_config, logger as streamlit_logger
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Credenciales ficticias: create_client solo valida su formato
+_ENTORNO = {
+    "SUPABASE_URL": "http://supabase.local",
+    "SUPABASE_KEY": "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.firma"
+}
+
+class _BuscadorDatabase(importlib.abc.MetaPathFinder):
+    """Resuelve `import database`: el módulo no tiene extensión .py"""
+
+    def find_spec(self, nombre, ruta, objetivo=None):
+        if nombre != "database":
+            return None
+        cargador = importlib.machinery.SourceFileLoader(nombre, os.path.join(RAIZ, "database"))
+        return importlib.util.spec_from_loader(nombre, cargador)
+
+def preparar_importaciones():
+    """Credenciales ficticias y rutas para importar los módulos de la aplicación"""
+    for nombre, valor in _ENTORNO.items():
+        os.environ.setdefault(nombre, valor)
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    if not any(isinstance(buscador, _BuscadorDatabase) for buscador in sys.meta_path):
+        sys.meta_path.append(_BuscadorDatabase())
+
+def preparar(cliente_falso):
+    """Importa database (y sus dependencias) y sustituye database.client por cliente_falso"""
+    preparar_importaciones()
+
+    # Fuera de `streamlit run` Streamlit avisa en cada llamada a una caché. La configuración
+    # se lee al primer acceso y restablece el nivel, así que se fuerza la lectura antes
+    streamlit_config.get_option("logger.level")
+    streamlit_logger.set_log_level("error")
+
+    import database as db
+    db.client = cliente_falso
+    return db
+
+def preparar_apptest():
+    """Ajusta AppTest (Streamlit 1.29) para ejecutar sesiones en el mismo proceso como en un servidor"""
+    from unittest.mock import MagicMock
+
+    from streamlit import runtime
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import element_tree, local_script_runner
+
+    # Cada ejecución de AppTest instala su propio Runtime y al terminar lo borra, aunque
+    # otras sesiones sigan ejecutándose. Se usa un único Runtime para todo el proceso
+    compartido = MagicMock(spec=Runtime)
+    compartido.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    compartido.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.exists = lambda: True
+    runtime.get_instance = lambda: compartido
+
+    # Cada ejecución compila app.py con su propia caché, y en Python 3.11 compilar a la vez
+    # desde varios hilos falla ("AST constructor recursion depth mismatch"). Como el
+    # servidor, todas las sesiones comparten la caché de bytecode
+    cache_scripts = ScriptCache()
+    local_script_runner.ScriptCache = lambda: cache_scripts
+
+    # Con format_func, AppTest busca el valor (un id) entre las etiquetas y falla al
+    # reenviar el estado de los widgets; como no se cambian, vale su opción por defecto
+    for clase in (element_tree.Selectbox, element_tree.Radio):
+        original = clase.index.fget
+
+        def indice(self, original=original):
+            try:
+                return original(self)
+            except ValueError:
+                return self.proto.default
+
+        clase.index = property(indice)
+
+def vaciar_caches():
+    """Vacía las cachés de Streamlit, de figuras, del registro reciente y del padrón para medir en frío"""
+    import streamlit as st
+    import graficas
+    import actividad_reciente
+    import padron
+    st.cache_data.clear()
+    graficas.vaciar()
+    actividad_reciente.vaciar()
+    padron.get_padron.clear()
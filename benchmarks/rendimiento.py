@@ -0,0 +1,239 @@
+"""Benchmark de las funciones de database y de cada página de la aplicación.
+
+Se ejecuta sin Supabase, contra un cliente en memoria con datos sintéticos. Las
+páginas son las de app.py, ejecutadas con AppTest en una sesión nueva con el
+monitor ya identificado:
+
+    python -m benchmarks.rendimiento --escala grande --salida base.json
+    python -m benchmarks.rendimiento --escala grande --comparar base.json --fallar
+    python -m benchmarks.rendimiento --escala grande --replica   # lecturas desde la réplica SQLite
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from functools import partial
+
+from benchmarks import datos_sinteticos, entorno
+from benchmarks.supabase_falso import SupabaseFalso
+
+# Fecha de referencia de los datos sintéticos (hace las veces de "hoy")
+HOY = date(2026, 10, 16)
+
+def _fecha(dias_atras):
+    return (HOY - timedelta(days=dias_atras)).strftime("%Y-%m-%d")
+
+def escenarios(db):
+    """Escenarios a medir: nombre -> función sin argumentos. Las escrituras van al final"""
+    # Importaciones diferidas: necesitan database ya cargado
+    from streamlit.testing.v1 import AppTest
+    from exportacion import exportar
+
+    miembros = db.get_miembros()
+    miembro_id = miembros[len(miembros) // 2]["id"]
+    texto_busqueda = miembros[0]["apellidos"].split()[0].lower()
+    usuario = db.verify_credenciales(datos_sinteticos.EMAIL_MONITOR, datos_sinteticos.PASSWORD_MONITOR)
+
+    def ejecutar_pagina(nombre, **estado):
+        """Ejecuta una página de app.py en una sesión nueva; estado fija valores de sus widgets"""
+        at = AppTest.from_file(os.path.join(entorno.RAIZ, "app.py"), default_timeout=300)
+        at.session_state["logged_in"] = True
+        at.session_state["usuario"] = usuario
+        at.session_state["menu_pagina"] = nombre
+        for clave, valor in estado.items():
+            at.session_state[clave] = valor
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{nombre}: {at.exception[0].value}")
+
+    def exportacion_365_dias(formato):
+        paginas = db.iter_registro_actividades(fecha_inicio=_fecha(365), fecha_fin=_fecha(0), tamano_pagina=1000)
+        return exportar(paginas, formato)
+
+    def registro_completo_30_dias():
+        return sum(len(pagina) for pagina in db.iter_registro_actividades(fecha_inicio=_fecha(30), fecha_fin=_fecha(0)))
+
+    return {
+        "db.verify_credenciales": partial(
+            db.verify_credenciales, datos_sinteticos.EMAIL_MONITOR, datos_sinteticos.PASSWORD_MONITOR
+        ),
+        "db.get_miembros": db.get_miembros,
+        "db.buscar_miembros": partial(db.buscar_miembros, texto_busqueda),
+        "db.get_secciones": db.get_secciones,
+        "db.get_grupos": db.get_grupos,
+        "db.get_actividades": db.get_actividades,
+        "db.get_turnos": db.get_turnos,
+        "db.iter_registro_actividades.primera_pagina": lambda: next(db.iter_registro_actividades(), []),
+        "db.iter_registro_actividades.30_dias": registro_completo_30_dias,
+        "db.get_registro_actividades.7_dias": partial(db.get_registro_actividades, fecha_inicio=_fecha(7), fecha_fin=_fecha(0)),
+        "db.get_registro_actividades.miembro": partial(db.get_registro_actividades, miembro_id=miembro_id),
+        "db.get_registro_actividades.seccion_30_dias": partial(
+            db.get_registro_actividades, fecha_inicio=_fecha(30), fecha_fin=_fecha(0), seccion_id=1
+        ),
+        "db.get_estadisticas_actividades_por_seccion": partial(
+            db.get_estadisticas_actividades_por_seccion, fecha_inicio=_fecha(30), fecha_fin=_fecha(0)
+        ),
+        "db.get_estadisticas_actividades_por_grupo": partial(
+            db.get_estadisticas_actividades_por_grupo, fecha_inicio=_fecha(30), fecha_fin=_fecha(0)
+        ),
+        "db.get_estadisticas_miembros_sin_actividades": partial(
+            db.get_estadisticas_miembros_sin_actividades, fecha_inicio=_fecha(30), fecha_fin=_fecha(0)
+        ),
+        "db.get_registro_compacto.365_dias": partial(db.get_registro_compacto, _fecha(365), _fecha(0)),
+        "pagina.dashboard": partial(ejecutar_pagina, "Dashboard"),
+        "pagina.dashboard.recarga": partial(ejecutar_pagina, "Dashboard"),
+        "pagina.miembros": partial(ejecutar_pagina, "Gestión de Miembros", filtro_nombre_miembros=texto_busqueda),
+        "pagina.agendar": partial(ejecutar_pagina, "Agendar Actividad"),
+        "pagina.agendar.recarga": partial(ejecutar_pagina, "Agendar Actividad"),
+        "pagina.registro": partial(ejecutar_pagina, "Registro de Actividades"),
+        "pagina.estadisticas": partial(ejecutar_pagina, "Estadísticas"),
+        "pagina.estadisticas.recarga": partial(ejecutar_pagina, "Estadísticas"),
+        "pagina.tendencias": partial(ejecutar_pagina, "Tendencias"),
+        "exportacion.csv_365_dias": partial(exportacion_365_dias, "csv"),
+        "exportacion.parquet_365_dias": partial(exportacion_365_dias, "parquet"),
+        # Escrituras: modifican los datos, por eso se miden al final
+        "db.add_registros_actividad_por_grupo": partial(
+            db.add_registros_actividad_por_grupo, actividad_id=1, fecha=_fecha(-1), turno_id=1, monitor_id=1, grupo_id=1
+        ),
+        "db.reconstruir_resumen_diario": partial(db.reconstruir_resumen_diario, _fecha(30), _fecha(0)),
+        "db.actualizar_ultima_actividad": db.actualizar_ultima_actividad
+    }
+
+# Escenarios que se miden con las cachés llenas (p. ej. otra sesión que abre la misma página)
+_CON_CACHE = {"pagina.dashboard.recarga", "pagina.agendar.recarga", "pagina.estadisticas.recarga"}
+
+def medir_escenarios(db, cliente, repeticiones, filtro=None):
+    """Mide cada escenario con las cachés vacías (o llenas, ver _CON_CACHE); devuelve tiempos (ms) y peticiones"""
+    resultados = {}
+    for nombre, funcion in escenarios(db).items():
+        if filtro and filtro not in nombre:
+            continue
+        tiempos = []
+        peticiones = 0
+        # Una ejecución de calentamiento (importaciones, compilación de plantillas de plotly...)
+        entorno.vaciar_caches()
+        funcion()
+        for _ in range(repeticiones):
+            if nombre not in _CON_CACHE:
+                entorno.vaciar_caches()
+            antes = cliente.total_peticiones()
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            peticiones = cliente.total_peticiones() - antes
+        resultados[nombre] = {
+            "mediana_ms": round(statistics.median(tiempos), 2),
+            "min_ms": round(min(tiempos), 2),
+            "max_ms": round(max(tiempos), 2),
+            "peticiones": peticiones
+        }
+        print(f"{nombre:<50} {resultados[nombre]['mediana_ms']:>10.1f} ms  {peticiones:>5} peticiones", flush=True)
+    return resultados
+
+def comparar(base, actual, umbral, minimo_ms=1.0):
+    """Compara medianas con un informe anterior; devuelve los escenarios que empeoran más del umbral"""
+    regresiones = []
+    print(f"\n{'escenario':<50} {'base':>10} {'actual':>10} {'cambio':>8}")
+    for nombre, resultado in actual["resultados"].items():
+        anterior = base["resultados"].get(nombre)
+        if anterior is None:
+            continue
+        cambio = resultado["mediana_ms"] / anterior["mediana_ms"] - 1 if anterior["mediana_ms"] else 0.0
+        # Por debajo de minimo_ms las diferencias son ruido
+        empeora = cambio > umbral and resultado["mediana_ms"] - anterior["mediana_ms"] > minimo_ms
+        if empeora:
+            regresiones.append(nombre)
+        print(
+            f"{nombre:<50} {anterior['mediana_ms']:>10.1f} {resultado['mediana_ms']:>10.1f} "
+            f"{cambio:>+7.0%}{'  <- regresión' if empeora else ''}"
+        )
+    if base["metadatos"].get("escala") != actual["metadatos"].get("escala"):
+        print("Aviso: los informes usan escalas distintas")
+    if base["metadatos"].get("replica", False) != actual["metadatos"].get("replica", False):
+        print("Aviso: solo uno de los informes usa la réplica local")
+    return regresiones
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=entorno.RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", choices=datos_sinteticos.ESCALAS, default="pequena")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="latencia simulada por petición")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--filtro", help="medir solo los escenarios cuyo nombre contiene este texto")
+    parser.add_argument("--salida", help="fichero JSON donde guardar el informe")
+    parser.add_argument("--comparar", help="informe JSON anterior con el que comparar")
+    parser.add_argument("--umbral", type=float, default=0.2, help="empeoramiento relativo tolerado (0.2 = 20%%)")
+    parser.add_argument("--fallar", action="store_true", help="salir con código 1 si hay regresiones")
+    parser.add_argument("--replica", action="store_true", help="servir las lecturas desde la réplica local en SQLite")
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    tablas = datos_sinteticos.generar_escala(args.escala, semilla=args.semilla)
+    print(f"Datos '{args.escala}' generados en {time.perf_counter() - inicio:.1f}s", flush=True)
+
+    cliente = SupabaseFalso(tablas, latencia=args.latencia_ms / 1000)
+    db = entorno.preparar(cliente)
+    entorno.preparar_apptest()
+    import instrumentacion
+
+    with tempfile.TemporaryDirectory() as directorio:
+        sincronizacion_ms = None
+        if args.replica:
+            import replica
+            replica.iniciar(lambda: db.client, ruta=f"{directorio}/replica.sqlite3", intervalo=None)
+            inicio = time.perf_counter()
+            replica.sincronizar()
+            sincronizacion_ms = round((time.perf_counter() - inicio) * 1000, 2)
+            print(f"Réplica local sincronizada en {sincronizacion_ms / 1000:.1f}s", flush=True)
+
+        instrumentacion.reiniciar()
+        resultados = medir_escenarios(db, cliente, args.repeticiones, args.filtro)
+
+    informe = {
+        "metadatos": {
+            "escala": args.escala,
+            "miembros": len(tablas["miembros"]),
+            "registros": len(tablas["registro_actividades"]),
+            "repeticiones": args.repeticiones,
+            "latencia_ms": args.latencia_ms,
+            "semilla": args.semilla,
+            "replica": args.replica,
+            "sincronizacion_replica_ms": sincronizacion_ms,
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "resultados": resultados,
+        "metricas": instrumentacion.get_metricas()
+    }
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"\nInforme guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regresiones = comparar(json.load(f), informe, args.umbral)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones por encima del {args.umbral:.0%}")
+            if args.fallar:
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,640 @@
+"""Sustituto local de Supabase/PostgREST para benchmarks y pruebas de carga.
+
+Implementa sobre DataFrames en memoria el subconjunto de la API de postgrest-py
+que usa el módulo database, y en Python las funciones RPC definidas en
+supabase/migrations.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from postgrest.exceptions import APIError
+
+# Recurso embebido: tabla[!inner](columnas):columna_fk
+_EMBEBIDO = re.compile(r"^(\w+)(!inner)?\(([^)]*)\):(\w+)$")
+
+# Valores por defecto de las columnas al insertar
+_DEFECTOS = {
+    "miembros": {"activo": True},
+    "actividades": {"activo": True, "descripcion": None},
+    "registro_actividades": {"observaciones": None}
+}
+
+# Restricciones de unicidad (migraciones); las claves con algún NULL no entran en conflicto
+_UNICAS = {
+    "registro_actividades": [("miembro_id", "actividad_id", "fecha", "turno_id"), ("clave_idempotencia",)]
+}
+
+class Respuesta:
+    """Respuesta con la misma forma que la de postgrest-py"""
+
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+class _Parametros(tuple):
+    """Imita httpx.QueryParams.add() para los parámetros añadidos a mano (p. ej. "or")"""
+
+    def add(self, clave, valor):
+        return _Parametros(self + ((clave, valor),))
+
+class SupabaseFalso:
+    """Cliente de Supabase en memoria"""
+
+    def __init__(self, tablas, latencia=0.0):
+        self.tablas = {nombre: df.reset_index(drop=True) for nombre, df in tablas.items()}
+        self.latencia = latencia
+        self.peticiones = Counter()
+        self._lock = threading.RLock()
+        self._versiones = Counter()
+        self._cache = {}
+        self._claves_unicas = {}
+
+    def table(self, nombre):
+        return ConsultaFalsa(self, nombre)
+
+    from_ = table
+
+    def rpc(self, nombre, params=None):
+        return RpcFalsa(self, nombre, params or {})
+
+    def total_peticiones(self):
+        """Número total de peticiones recibidas"""
+        with self._lock:
+            return sum(self.peticiones.values())
+
+    # Utilidades internas
+
+    def _peticion(self, clave):
+        """Cuenta la petición y simula la latencia de red"""
+        with self._lock:
+            self.peticiones[clave] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def _cacheado(self, tipo, tabla, extra, calcular):
+        """Valor derivado de una tabla que se recalcula cuando la tabla cambia"""
+        clave = (tipo, tabla, self._versiones[tabla], extra)
+        valor = self._cache.get(clave)
+        if valor is None:
+            valor = self._cache[clave] = calcular()
+        return valor
+
+    def _modificada(self, tabla):
+        """Invalida los valores derivados de una tabla (y las consultas, que pueden embeberla)"""
+        self._versiones[tabla] += 1
+        for clave in [clave for clave in self._cache if clave[1] == tabla or clave[0] == "consulta"]:
+            del self._cache[clave]
+
+    def _indice_ids(self, tabla):
+        """pd.Index de los ids de una tabla, para buscar posiciones"""
+        return self._cacheado("ids", tabla, None, lambda: pd.Index(self.tablas[tabla]["id"]))
+
+    def _filas_por_id(self, tabla):
+        """Diccionario id -> fila (tipos de Python) de una tabla"""
+        return self._cacheado(
+            "filas", tabla, None,
+            lambda: {fila["id"]: fila for fila in _a_registros(self.tablas[tabla])}
+        )
+
+    def _permutacion(self, tabla, orden):
+        """Posiciones de las filas de una tabla ordenadas según orden [(columna, desc)]"""
+        def calcular():
+            df = self.tablas[tabla]
+            ordenado = df.sort_values(
+                [columna for columna, _ in orden],
+                ascending=[not desc for _, desc in orden],
+                kind="mergesort"
+            )
+            return ordenado.index.to_numpy()
+        return self._cacheado("orden", tabla, tuple(orden), calcular)
+
+    def _valores_embebidos(self, tabla, columna, ids):
+        """Valores de tabla.columna para cada id de ids (NaN si no existe)"""
+        posiciones = self._indice_ids(tabla).get_indexer(ids)
+        valores = self.tablas[tabla][columna].to_numpy()
+        resultado = np.where(posiciones >= 0, valores[np.maximum(posiciones, 0)], None)
+        return resultado, posiciones >= 0
+
+    def _claves(self, tabla, columnas):
+        """Conjunto de claves existentes para una restricción de unicidad"""
+        clave = (tabla, columnas)
+        if clave not in self._claves_unicas:
+            df = self.tablas[tabla]
+            self._claves_unicas[clave] = set(zip(*(_normalizar(df[c]) for c in columnas)))
+        return self._claves_unicas[clave]
+
+    def _insertar(self, tabla, filas, on_conflict=None, ignorar_duplicados=False):
+        """Inserta filas asignando ids; con ignorar_duplicados descarta las que entran en conflicto"""
+        with self._lock:
+            df = self.tablas[tabla]
+            siguiente_id = int(df["id"].max()) + 1 if len(df) else 1
+            # ON CONFLICT (on_conflict) DO NOTHING solo ignora los conflictos de esa restricción
+            objetivo = tuple(on_conflict.split(",")) if on_conflict and ignorar_duplicados else None
+            restricciones = {columnas: self._claves(tabla, columnas) for columnas in _UNICAS.get(tabla, [])}
+            if objetivo and objetivo not in restricciones:
+                restricciones[objetivo] = self._claves(tabla, objetivo)
+
+            nuevas = []
+            for fila in filas:
+                fila = {**_DEFECTOS.get(tabla, {}), **fila}
+                claves_fila = {
+                    columnas: tuple(_normalizar_valor(fila.get(c)) for c in columnas) for columnas in restricciones
+                }
+                conflictos = [
+                    columnas for columnas, clave in claves_fila.items()
+                    if None not in clave and clave in restricciones[columnas]
+                ]
+                if objetivo in conflictos:
+                    continue
+                if conflictos:
+                    # Las claves de las filas anteriores del lote ya se han añadido a los conjuntos
+                    self._claves_unicas = {c: v for c, v in self._claves_unicas.items() if c[0] != tabla}
+                    raise APIError({
+                        "code": "23505",
+                        "message": f'duplicate key value violates unique constraint on {tabla} ({", ".join(conflictos[0])})',
+                        "details": None,
+                        "hint": None
+                    })
+                for columnas, clave in claves_fila.items():
+                    restricciones[columnas].add(clave)
+                fila.setdefault("id", siguiente_id)
+                if "updated_at" in df.columns:
+                    fila["updated_at"] = _ahora()
+                siguiente_id = max(siguiente_id, fila["id"]) + 1
+                nuevas.append(fila)
+
+            if not nuevas:
+                return []
+
+            nuevo = pd.DataFrame(nuevas)
+            for columna in nuevo.columns:
+                if columna in df.columns and pd.api.types.is_datetime64_any_dtype(df[columna]):
+                    # Mismo dtype que la tabla: concat de datetime64 con unidades distintas da object
+                    nuevo[columna] = pd.to_datetime(nuevo[columna]).astype(df[columna].dtype)
+            self.tablas[tabla] = pd.concat([df, nuevo], ignore_index=True)
+            self._modificada(tabla)
+            self._despues_de_insertar(tabla, nuevo)
+            return _a_registros(nuevo)
+
+    def _despues_de_insertar(self, tabla, nuevas):
+        """Equivalente a los disparadores de las migraciones"""
+        if tabla == "registro_actividades" and "ultima_actividad" in self.tablas["miembros"]:
+            self._actualizar_ultima_actividad(nuevas["miembro_id"].unique())
+
+    def _actualizar_ultima_actividad(self, miembro_ids=None):
+        """Recalcula miembros.ultima_actividad; devuelve el número de miembros que cambian"""
+        miembros = self.tablas["miembros"]
+        registro = self.tablas["registro_actividades"]
+        if miembro_ids is not None:
+            registro = registro[registro["miembro_id"].isin(miembro_ids)]
+        ultima = registro.groupby("miembro_id")["fecha"].max()
+        afectados = miembros["id"].isin(miembro_ids) if miembro_ids is not None else np.ones(len(miembros), dtype=bool)
+        nueva = miembros["id"].map(ultima)
+        cambian = afectados & (nueva.ne(miembros["ultima_actividad"]) & ~(nueva.isna() & miembros["ultima_actividad"].isna()))
+        if cambian.any():
+            miembros = miembros.copy()
+            # Como el disparador fijar_updated_at de miembros, ultima_actividad no cambia updated_at
+            miembros.loc[cambian, "ultima_actividad"] = nueva[cambian]
+            self.tablas["miembros"] = miembros
+            self._modificada("miembros")
+        return int(cambian.sum())
+
+    def _actualizar(self, tabla, posiciones, datos):
+        """Actualiza las filas indicadas y las devuelve"""
+        with self._lock:
+            df = self.tablas[tabla].copy()
+            if "updated_at" in df.columns:
+                datos = {**datos, "updated_at": _ahora()}
+            for columna, valor in datos.items():
+                if columna in df.columns and pd.api.types.is_datetime64_any_dtype(df[columna]):
+                    valor = pd.Timestamp(valor) if valor is not None else pd.NaT
+                df.loc[posiciones, columna] = valor
+            self.tablas[tabla] = df
+            self._modificada(tabla)
+            self._claves_unicas = {c: v for c, v in self._claves_unicas.items() if c[0] != tabla}
+            return _a_registros(df.iloc[posiciones])
+
+    def _registro_en_periodo(self, params):
+        """Registros de actividad entre p_fecha_inicio y p_fecha_fin (ambos opcionales)"""
+        registro = self.tablas["registro_actividades"]
+        mascara = np.ones(len(registro), dtype=bool)
+        if params.get("p_fecha_inicio"):
+            mascara &= (registro["fecha"] >= pd.Timestamp(params["p_fecha_inicio"])).to_numpy()
+        if params.get("p_fecha_fin"):
+            mascara &= (registro["fecha"] <= pd.Timestamp(params["p_fecha_fin"])).to_numpy()
+        return registro[mascara]
+
+    # Funciones RPC (ver supabase/migrations)
+
+    def _estadisticas(self, params, dimension, tabla_dimension):
+        """Totales por sección o grupo y actividad"""
+        registro = self._registro_en_periodo(params)
+        ids_dimension, existe = self._valores_embebidos(
+            "miembros", f"{dimension}_id", registro["miembro_id"].to_numpy()
+        )
+        totales = (
+            pd.DataFrame({"dimension": ids_dimension[existe], "actividad": registro["actividad_id"].to_numpy()[existe]})
+            .groupby(["dimension", "actividad"])
+            .size()
+            .reset_index(name="total")
+        )
+        nombres_dimension = self.tablas[tabla_dimension].set_index("id")["nombre"]
+        nombres_actividad = self.tablas["actividades"].set_index("id")["nombre"]
+        resultado = pd.DataFrame({
+            dimension: totales["dimension"].map(nombres_dimension),
+            "actividad": totales["actividad"].map(nombres_actividad),
+            "total": totales["total"]
+        }).dropna().sort_values([dimension, "actividad"])
+        return resultado.to_dict("records")
+
+    def _rpc_estadisticas_actividades_por_seccion(self, params):
+        return self._estadisticas(params, "seccion", "secciones")
+
+    def _rpc_estadisticas_actividades_por_grupo(self, params):
+        return self._estadisticas(params, "grupo", "grupos")
+
+    def _rpc_miembros_sin_actividades(self, params):
+        activos = self._registro_en_periodo(params)["miembro_id"].unique()
+        miembros = self.tablas["miembros"]
+        return self._sin_actividades(miembros[miembros["activo"] & ~miembros["id"].isin(activos)])
+
+    def _rpc_miembros_sin_actividades_v2(self, params):
+        # Igual que la función SQL: solo se mira el registro de los miembros con actividad posterior al período
+        miembros = self.tablas["miembros"]
+        miembros = miembros[miembros["activo"]]
+        ultima = miembros["ultima_actividad"]
+        inicio, fin = pd.Timestamp(params["p_fecha_inicio"]), pd.Timestamp(params["p_fecha_fin"])
+        posteriores = miembros[ultima > fin]
+        registro = self.tablas["registro_actividades"]
+        registro = registro[registro["miembro_id"].isin(posteriores["id"])]
+        con_actividad = registro[(registro["fecha"] >= inicio) & (registro["fecha"] <= fin)]["miembro_id"].unique()
+        sin_actividad = ultima.isna() | (ultima < inicio) | ((ultima > fin) & ~miembros["id"].isin(con_actividad))
+        return self._sin_actividades(miembros[sin_actividad])
+
+    def _rpc_actualizar_ultima_actividad_desde(self, params):
+        return self._actualizar_ultima_actividad(params.get("p_miembro_ids"))
+
+    def _sin_actividades(self, miembros):
+        """Filas de las funciones miembros_sin_actividades_*"""
+        resultado = pd.DataFrame({
+            "id": miembros["id"],
+            "nip": miembros["nip"],
+            "nombre": miembros["nombre"],
+            "apellidos": miembros["apellidos"],
+            "seccion": miembros["seccion_id"].map(self.tablas["secciones"].set_index("id")["nombre"]),
+            "grupo": miembros["grupo_id"].map(self.tablas["grupos"].set_index("id")["nombre"])
+        }).dropna(subset=["seccion", "grupo"]).sort_values(["seccion", "grupo", "apellidos"])
+        return resultado.to_dict("records")
+
+    def _rpc_registro_compacto(self, params):
+        registro = self._registro_en_periodo(params).sort_values(["fecha", "id"])
+        secciones, _ = self._valores_embebidos("miembros", "seccion_id", registro["miembro_id"].to_numpy())
+        dias = (registro["fecha"] - pd.Timestamp(params["p_fecha_inicio"])).dt.days
+        return [{
+            "miembro_id": registro["miembro_id"].tolist(),
+            "dia": dias.tolist(),
+            "actividad_id": registro["actividad_id"].tolist(),
+            "turno_id": registro["turno_id"].tolist(),
+            "seccion_id": [int(s) if s is not None else 0 for s in secciones]
+        }]
+
+    def _rpc_buscar_miembros(self, params):
+        texto = " ".join(str(params["p_texto"]).lower().split())
+        miembros = self.tablas["miembros"]
+        miembros = miembros[miembros["activo"]]
+        for columna in ("seccion_id", "grupo_id"):
+            if params.get(f"p_{columna}") is not None:
+                miembros = miembros[miembros[columna] == params[f"p_{columna}"]]
+        nombre_completo = (miembros["nombre"] + " " + miembros["apellidos"]).str.lower()
+        por_nip = miembros["nip"].astype(str).str.startswith(texto)
+        por_nombre = nombre_completo.str.contains(texto, regex=False)
+        encontrados = miembros[por_nip | por_nombre].copy()
+        # Aproximación de similarity(): proporción del nombre cubierta por el texto
+        encontrados["relevancia"] = np.where(
+            por_nip[por_nip | por_nombre], 1.0, len(texto) / nombre_completo[por_nip | por_nombre].str.len()
+        )
+        encontrados = encontrados.sort_values(["relevancia", "apellidos", "nombre"], ascending=[False, True, True])
+        columnas = ["id", "nip", "nombre", "apellidos", "seccion_id", "grupo_id", "relevancia"]
+        return _a_registros(encontrados.head(int(params.get("p_limite", 50)))[columnas])
+
+    def _rpc_reconstruir_resumen_diario(self, params):
+        registro = self._registro_en_periodo(params)
+        secciones, _ = self._valores_embebidos("miembros", "seccion_id", registro["miembro_id"].to_numpy())
+        grupos, _ = self._valores_embebidos("miembros", "grupo_id", registro["miembro_id"].to_numpy())
+        claves = pd.DataFrame({
+            "fecha": registro["fecha"].to_numpy(),
+            "seccion": secciones,
+            "grupo": grupos,
+            "actividad": registro["actividad_id"].to_numpy(),
+            "turno": registro["turno_id"].to_numpy()
+        })
+        return len(claves.drop_duplicates())
+
+    # Nombre de la función RPC -> implementación (todas las versiones compatibles)
+    _RPCS = {
+        "estadisticas_actividades_por_seccion_v1": _rpc_estadisticas_actividades_por_seccion,
+        "estadisticas_actividades_por_seccion_v2": _rpc_estadisticas_actividades_por_seccion,
+        "estadisticas_actividades_por_grupo_v1": _rpc_estadisticas_actividades_por_grupo,
+        "estadisticas_actividades_por_grupo_v2": _rpc_estadisticas_actividades_por_grupo,
+        "miembros_sin_actividades_v1": _rpc_miembros_sin_actividades,
+        "miembros_sin_actividades_v2": _rpc_miembros_sin_actividades_v2,
+        "actualizar_ultima_actividad_desde": _rpc_actualizar_ultima_actividad_desde,
+        "buscar_miembros_v1": _rpc_buscar_miembros,
+        "buscar_miembros_v2": _rpc_buscar_miembros,
+        "registro_compacto_v1": _rpc_registro_compacto,
+        "reconstruir_resumen_diario": _rpc_reconstruir_resumen_diario
+    }
+
+class RpcFalsa:
+    """Llamada a una función RPC"""
+
+    def __init__(self, cliente, nombre, params):
+        self.cliente = cliente
+        self.nombre = nombre
+        self.params = params
+
+    def execute(self):
+        funcion = SupabaseFalso._RPCS.get(self.nombre)
+        if funcion is None:
+            raise APIError({
+                "code": "PGRST202",
+                "message": f"Could not find the function public.{self.nombre}",
+                "details": None,
+                "hint": None
+            })
+        self.cliente._peticion(f"rpc:{self.nombre}")
+        # Los índices de pandas no son seguros entre hilos: las funciones se ejecutan de una en una
+        with self.cliente._lock:
+            return Respuesta(funcion(self.cliente, self.params))
+
+class ConsultaFalsa:
+    """Consulta sobre una tabla con la API encadenable de postgrest-py"""
+
+    def __init__(self, cliente, tabla):
+        self.cliente = cliente
+        self.tabla = tabla
+        self.operacion = "select"
+        self.columnas = ["*"]
+        self.embebidos = {}
+        self.filtros = []
+        self.orden = []
+        self.limite = None
+        self.datos = None
+        self.on_conflict = None
+        self.ignorar_duplicados = False
+        self.params = _Parametros()
+
+    # Construcción de la consulta
+
+    def select(self, *columnas):
+        self.columnas = []
+        for columna in columnas:
+            coincidencia = _EMBEBIDO.match(columna)
+            if coincidencia:
+                tabla, inner, campos, fk = coincidencia.groups()
+                self.embebidos[tabla] = {
+                    "campos": [campo.strip() for campo in campos.split(",")],
+                    "inner": bool(inner),
+                    "fk": fk
+                }
+            else:
+                self.columnas.append(columna)
+        return self
+
+    def insert(self, datos, **kwargs):
+        self.operacion = "insert"
+        self.datos = datos if isinstance(datos, list) else [datos]
+        return self
+
+    def upsert(self, datos, on_conflict="", ignore_duplicates=False, **kwargs):
+        if not ignore_duplicates:
+            raise NotImplementedError("Solo se admite upsert con ignore_duplicates=True")
+        self.operacion = "upsert"
+        self.datos = datos if isinstance(datos, list) else [datos]
+        self.on_conflict = on_conflict or None
+        self.ignorar_duplicados = True
+        return self
+
+    def update(self, datos, **kwargs):
+        self.operacion = "update"
+        self.datos = datos
+        return self
+
+    def _filtro(self, columna, operador, valor):
+        self.filtros.append((columna, operador, valor))
+        return self
+
+    def eq(self, columna, valor):
+        return self._filtro(columna, "eq", valor)
+
+    def neq(self, columna, valor):
+        return self._filtro(columna, "neq", valor)
+
+    def gt(self, columna, valor):
+        return self._filtro(columna, "gt", valor)
+
+    def gte(self, columna, valor):
+        return self._filtro(columna, "gte", valor)
+
+    def lt(self, columna, valor):
+        return self._filtro(columna, "lt", valor)
+
+    def lte(self, columna, valor):
+        return self._filtro(columna, "lte", valor)
+
+    def in_(self, columna, valores):
+        return self._filtro(columna, "in", list(valores))
+
+    def order(self, columna, desc=False, **kwargs):
+        # Igual que postgrest-py: ".desc" se añade a la última columna de la lista
+        for parte in f"{columna}{'.desc' if desc else ''}".split(","):
+            nombre, _, direccion = parte.partition(".")
+            self.orden.append((nombre, direccion == "desc"))
+        return self
+
+    def limit(self, cantidad, **kwargs):
+        self.limite = cantidad
+        return self
+
+    # Ejecución
+
+    def execute(self):
+        self.cliente._peticion(f"{self.operacion}:{self.tabla}")
+
+        if self.operacion in ("insert", "upsert"):
+            return Respuesta(self.cliente._insertar(
+                self.tabla, self.datos, self.on_conflict, self.ignorar_duplicados
+            ))
+
+        with self.cliente._lock:
+            df = self.cliente.tablas[self.tabla]
+
+            if self.operacion == "update":
+                posiciones = self._expresiones_or(df, self._filtrar(df))
+                return Respuesta(self.cliente._actualizar(self.tabla, posiciones, self.datos))
+
+            # Las páginas sucesivas de una misma consulta solo cambian el "or" de la clave,
+            # así que las filas filtradas y ordenadas se reutilizan (como haría un índice)
+            clave = (
+                tuple((c, o, tuple(v) if isinstance(v, list) else v) for c, o, v in self.filtros),
+                tuple(self.orden),
+                tuple((tabla, e["inner"]) for tabla, e in self.embebidos.items())
+            )
+            posiciones = self.cliente._cacheado("consulta", self.tabla, clave, lambda: self._ordenar(df, self._filtrar(df)))
+            posiciones = self._expresiones_or(df, posiciones)
+
+            if self.limite is not None:
+                posiciones = posiciones[:self.limite]
+
+            return Respuesta(self._proyectar(df, posiciones))
+
+    def _ordenar(self, df, posiciones):
+        """Ordena las posiciones según la cláusula order"""
+        if not self.orden:
+            return posiciones
+        permutacion = self.cliente._permutacion(self.tabla, self.orden)
+        seleccion = np.zeros(len(df), dtype=bool)
+        seleccion[posiciones] = True
+        return permutacion[seleccion[permutacion]]
+
+    def _filtrar(self, df):
+        """Posiciones de las filas que cumplen los filtros (salvo las expresiones "or")"""
+        mascara = np.ones(len(df), dtype=bool)
+        embebidos = []
+        for columna, operador, valor in self.filtros:
+            if "." in columna:
+                embebidos.append((columna, operador, valor))
+            else:
+                mascara &= _condicion(df[columna], operador, valor)
+
+        posiciones = np.flatnonzero(mascara)
+
+        # Recursos embebidos con !inner: se descartan las filas sin relación o que no cumplen el filtro
+        for tabla, embebido in self.embebidos.items():
+            if not embebido["inner"]:
+                continue
+            ids = df[embebido["fk"]].to_numpy()[posiciones]
+            _, existe = self.cliente._valores_embebidos(tabla, "id", ids)
+            posiciones = posiciones[existe]
+
+        for columna, operador, valor in embebidos:
+            tabla, campo = columna.split(".", 1)
+            embebido = self.embebidos.get(tabla)
+            if embebido is None or not embebido["inner"]:
+                raise NotImplementedError(f"El filtro {columna} requiere el recurso embebido {tabla}!inner")
+            ids = df[embebido["fk"]].to_numpy()[posiciones]
+            valores, _ = self.cliente._valores_embebidos(tabla, campo, ids)
+            posiciones = posiciones[_condicion(pd.Series(valores), operador, valor)]
+
+        return posiciones
+
+    def _expresiones_or(self, df, posiciones):
+        """Aplica los parámetros "or" a las posiciones, conservando su orden"""
+        for clave, valor in self.params:
+            if clave == "or":
+                posiciones = posiciones[self._expresion_or(df, valor, posiciones)]
+        return posiciones
+
+    def _expresion_or(self, df, expresion, posiciones):
+        """Evalúa una expresión or=(...) de PostgREST sobre las filas indicadas"""
+        def evaluar(terminos, combinar):
+            mascaras = []
+            for termino in terminos:
+                if termino.startswith(("and(", "or(")):
+                    operador, _, resto = termino.partition("(")
+                    mascaras.append(evaluar(_dividir(resto[:-1]), np.logical_and if operador == "and" else np.logical_or))
+                else:
+                    columna, operador, valor = termino.split(".", 2)
+                    valor = valor.strip('"')
+                    # iloc conserva el dtype (to_numpy() convierte timestamptz en objetos)
+                    serie = df[columna].iloc[posiciones].reset_index(drop=True)
+                    mascaras.append(_condicion(serie, operador, valor))
+            return combinar.reduce(mascaras)
+
+        return evaluar(_dividir(expresion.strip()[1:-1]), np.logical_or)
+
+    def _proyectar(self, df, posiciones):
+        """Convierte las filas seleccionadas en dicts con sus recursos embebidos"""
+        columnas = list(df.columns) if "*" in self.columnas else self.columnas
+        registros = _a_registros(df.iloc[posiciones][columnas])
+
+        for tabla, embebido in self.embebidos.items():
+            filas = self.cliente._filas_por_id(tabla)
+            ids = df[embebido["fk"]].to_numpy()[posiciones]
+            campos = embebido["campos"]
+            for registro, id_relacionado in zip(registros, ids):
+                fila = filas.get(int(id_relacionado)) if pd.notna(id_relacionado) else None
+                registro[tabla] = {campo: fila[campo] for campo in campos} if fila else None
+
+        return registros
+
+def _dividir(texto):
+    """Divide por comas de primer nivel (fuera de paréntesis)"""
+    partes, nivel, inicio = [], 0, 0
+    for i, caracter in enumerate(texto):
+        if caracter == "(":
+            nivel += 1
+        elif caracter == ")":
+            nivel -= 1
+        elif caracter == "," and nivel == 0:
+            partes.append(texto[inicio:i])
+            inicio = i + 1
+    partes.append(texto[inicio:])
+    return partes
+
+def _convertir(serie, valor):
+    """Convierte el valor de un filtro al tipo de la columna"""
+    if valor is None:
+        return None
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return pd.Timestamp(str(valor))
+    if pd.api.types.is_bool_dtype(serie):
+        return valor if isinstance(valor, bool) else str(valor).lower() == "true"
+    if pd.api.types.is_numeric_dtype(serie) and isinstance(valor, str):
+        return float(valor) if "." in valor else int(valor)
+    return valor
+
+def _condicion(serie, operador, valor):
+    """Máscara booleana de un filtro de PostgREST sobre una columna"""
+    if operador == "in":
+        return serie.isin([_convertir(serie, v) for v in valor]).to_numpy()
+    if operador == "is":
+        return serie.isna().to_numpy() if str(valor).lower() == "null" else (serie == _convertir(serie, valor)).to_numpy()
+    valor = _convertir(serie, valor)
+    comparaciones = {
+        "eq": serie.__eq__, "neq": serie.__ne__,
+        "gt": serie.__gt__, "gte": serie.__ge__,
+        "lt": serie.__lt__, "lte": serie.__le__
+    }
+    return comparaciones[operador](valor).fillna(False).to_numpy(dtype=bool)
+
+def _normalizar(serie):
+    """Valores de una columna tal como se comparan en las claves únicas"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime("%Y-%m-%d").tolist()
+    return serie.tolist()
+
+def _normalizar_valor(valor):
+    if isinstance(valor, pd.Timestamp):
+        return valor.strftime("%Y-%m-%d")
+    return valor
+
+def _ahora():
+    """Valor de updated_at que fija el disparador de la migración de la réplica"""
+    return pd.Timestamp.now(tz="UTC")
+
+def _a_registros(df):
+    """DataFrame -> lista de dicts con tipos de Python y fechas ISO"""
+    df = df.copy()
+    for columna in df.columns:
+        if isinstance(df[columna].dtype, pd.DatetimeTZDtype):
+            # timestamptz: como lo devuelve PostgREST
+            df[columna] = df[columna].dt.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+        elif pd.api.types.is_datetime64_any_dtype(df[columna]):
+            df[columna] = df[columna].dt.strftime("%Y-%m-%d")
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
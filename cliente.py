@@ -0,0 +1,89 @@
+import logging
+import random
+import time
+
+import instrumentacion
+from perezoso import importar_perezoso
+from config import (
+    SUPABASE_TIMEOUT, SUPABASE_TIMEOUT_CONEXION, SUPABASE_POOL_CONEXIONES,
+    SUPABASE_POOL_KEEPALIVE, SUPABASE_KEEPALIVE_EXPIRY, SUPABASE_REINTENTOS, SUPABASE_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+# Se importan al crear el cliente o al fallar una consulta, no al cargar la aplicación
+httpx = importar_perezoso("httpx")
+supabase = importar_perezoso("supabase")
+postgrest = importar_perezoso("postgrest")
+
+# Códigos de error de PostgREST/Postgres que indican un fallo transitorio
+_CODIGOS_TRANSITORIOS = {
+    "PGRST000", "PGRST001", "PGRST002",  # sin conexión con la base de datos
+    "57014",  # statement_timeout
+    "40001", "40P01",  # conflicto de serialización, interbloqueo
+    "53300"  # demasiadas conexiones
+}
+
+def crear_cliente(url, key, timeout=SUPABASE_TIMEOUT, timeout_conexion=SUPABASE_TIMEOUT_CONEXION,
+                  tamano_pool=SUPABASE_POOL_CONEXIONES, keepalive=SUPABASE_POOL_KEEPALIVE,
+                  keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY):
+    """Crea un cliente de Supabase con un pool de conexiones HTTP compartido y timeouts"""
+    cliente = supabase.create_client(url, key)
+
+    # Sustituir la sesión HTTP de PostgREST por una con pool y keep-alive configurables.
+    # La sesión se comparte entre todas las sesiones de Streamlit del proceso.
+    sesion = cliente.postgrest.session
+    limites = httpx.Limits(
+        max_connections=tamano_pool,
+        max_keepalive_connections=keepalive,
+        keepalive_expiry=keepalive_expiry
+    )
+    cliente.postgrest.session = httpx.Client(
+        base_url=sesion.base_url,
+        headers=sesion.headers,
+        timeout=httpx.Timeout(timeout, connect=timeout_conexion),
+        # Reintentos a nivel de conexión (seguros también para escrituras)
+        transport=httpx.HTTPTransport(limits=limites, retries=1)
+    )
+    sesion.close()
+
+    return cliente
+
+def _es_transitorio(error):
+    """Indica si un error merece reintentar la consulta"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, postgrest.APIError):
+        return error.code in _CODIGOS_TRANSITORIOS
+    # Respuestas de error sin JSON (p. ej. 502/503 de la pasarela)
+    return isinstance(error, ValueError)
+
+def ejecutar(consulta, operacion, idempotente=True):
+    """Ejecuta una consulta midiendo su latencia; las lecturas se reintentan con backoff exponencial"""
+    intentos = SUPABASE_REINTENTOS + 1 if idempotente else 1
+
+    for intento in range(intentos):
+        inicio = time.perf_counter()
+        try:
+            response = consulta.execute()
+        except Exception as error:
+            instrumentacion.registrar(f"supabase.{operacion}", time.perf_counter() - inicio, error=True)
+            if intento + 1 == intentos or not _es_transitorio(error):
+                raise
+            espera = SUPABASE_BACKOFF * 2 ** intento * (1 + random.random())
+            logger.warning("Reintentando %s en %.2fs tras error transitorio: %s", operacion, espera, error)
+            time.sleep(espera)
+        else:
+            instrumentacion.registrar(
+                f"supabase.{operacion}",
+                time.perf_counter() - inicio,
+                filas=len(response.data) if isinstance(response.data, list) else None
+            )
+            return response
+
+def get_metricas_latencia():
+    """Devuelve llamadas, errores y latencias (ms) de cada operación contra Supabase"""
+    return {
+        nombre[len("supabase."):]: metrica
+        for nombre, metrica in instrumentacion.get_metricas("supabase.").items()
+    }
@@ -1,9 +1,89 @@
 import os
 import streamlit as st
 
+def _get_config(nombre, default=None):
+    """Obtiene un valor de configuración de los secretos de Streamlit o de las variables de entorno"""
+    try:
+        if nombre in st.secrets:
+            return st.secrets[nombre]
+    except FileNotFoundError:
+        pass
+    return os.getenv(nombre, default)
+
 # Configuración de Supabase
-SUPABASE_URL = st.secrets["SUPABASE_URL"] if "SUPABASE_URL" in st.secrets else os.getenv("SUPABASE_URL")
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"] if "SUPABASE_KEY" in st.secrets else os.getenv("SUPABASE_KEY")
+SUPABASE_URL = _get_config("SUPABASE_URL")
+SUPABASE_KEY = _get_config("SUPABASE_KEY")
+
+# Conexiones HTTP con Supabase: timeouts (segundos), tamaño del pool,
+# conexiones keep-alive y reintentos con backoff de las lecturas
+SUPABASE_TIMEOUT = float(_get_config("SUPABASE_TIMEOUT", 10))
+SUPABASE_TIMEOUT_CONEXION = float(_get_config("SUPABASE_TIMEOUT_CONEXION", 5))
+SUPABASE_POOL_CONEXIONES = int(_get_config("SUPABASE_POOL_CONEXIONES", 20))
+SUPABASE_POOL_KEEPALIVE = int(_get_config("SUPABASE_POOL_KEEPALIVE", 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(_get_config("SUPABASE_KEEPALIVE_EXPIRY", 30))
+SUPABASE_REINTENTOS = int(_get_config("SUPABASE_REINTENTOS", 2))
+SUPABASE_BACKOFF = float(_get_config("SUPABASE_BACKOFF", 0.2))
+
+# Número máximo de consultas simultáneas de una misma ejecución al cargar una página
+CONSULTAS_PARALELAS = int(_get_config("CONSULTAS_PARALELAS", 8))
+
+# Configuración de la caché de datos de referencia (secciones, grupos, turnos, actividades y miembros)
+CACHE_TTL = int(_get_config("CACHE_TTL", 300))
+CACHE_MAX_ENTRIES = int(_get_config("CACHE_MAX_ENTRIES", 32))
+
+# Tamaño de página al recorrer el registro de actividades (PostgREST limita a 1000 filas por petición)
+REGISTRO_TAMANO_PAGINA = int(_get_config("REGISTRO_TAMANO_PAGINA", 500))
+
+# Número de filas por insert al agendar actividades en lote
+REGISTRO_TAMANO_LOTE = int(_get_config("REGISTRO_TAMANO_LOTE", 200))
+
+# Segundos que se comparten entre páginas y sesiones los miembros sin actividad de un período
+ESTADISTICAS_TTL = int(_get_config("ESTADISTICAS_TTL", 60))
+
+# Búsqueda de miembros: longitud mínima del texto, máximo de resultados y
+# segundos que se reutiliza el resultado de un mismo texto
+BUSQUEDA_MIN_CARACTERES = int(_get_config("BUSQUEDA_MIN_CARACTERES", 2))
+BUSQUEDA_LIMITE = int(_get_config("BUSQUEDA_LIMITE", 50))
+BUSQUEDA_TTL = int(_get_config("BUSQUEDA_TTL", 30))
+
+# Muestra en la barra lateral las consultas ahorradas por la memoria de cada ejecución
+DEBUG_CONSULTAS = str(_get_config("DEBUG_CONSULTAS", "false")).lower() == "true"
+
+# Muestra en la barra lateral el panel de rendimiento (llamadas, latencias y filas)
+PANEL_RENDIMIENTO = str(_get_config("PANEL_RENDIMIENTO", "false")).lower() == "true"
+
+# Filas por petición al exportar el registro de actividades (máximo 1000 en PostgREST)
+EXPORTACION_TAMANO_PAGINA = int(_get_config("EXPORTACION_TAMANO_PAGINA", 1000))
+
+# Número de figuras de Plotly que se conservan ya construidas y serializadas (las menos usadas se descartan)
+FIGURAS_CACHE_MAX = int(_get_config("FIGURAS_CACHE_MAX", 64))
+
+# Registro reciente compartido por todas las sesiones: días antes y después de hoy
+# que se mantienen en memoria y segundos hasta recargarlos completos desde Supabase
+RECIENTES_DIAS_ATRAS = int(_get_config("RECIENTES_DIAS_ATRAS", 14))
+RECIENTES_DIAS_ADELANTE = int(_get_config("RECIENTES_DIAS_ADELANTE", 14))
+RECIENTES_TTL = int(_get_config("RECIENTES_TTL", 900))
+
+# Réplica local en SQLite: lecturas sin esperar a Supabase y funcionamiento sin conexión.
+# Ruta del fichero, días de registro de actividades que se replican, segundos entre
+# sincronizaciones incrementales, filas por petición y segundos que se vuelven a pedir
+# antes de la última marca (transacciones que confirman con retraso)
+REPLICA_LOCAL = str(_get_config("REPLICA_LOCAL", "false")).lower() == "true"
+REPLICA_RUTA = _get_config("REPLICA_RUTA", "gimnasio_replica.sqlite3")
+REPLICA_DIAS_REGISTRO = int(_get_config("REPLICA_DIAS_REGISTRO", 90))
+REPLICA_INTERVALO = float(_get_config("REPLICA_INTERVALO", 30))
+REPLICA_TAMANO_PAGINA = int(_get_config("REPLICA_TAMANO_PAGINA", 1000))
+REPLICA_SOLAPE = float(_get_config("REPLICA_SOLAPE", 60))
+
+# Diario local de escritura diferida de los registros de actividad: los envíos del
+# formulario se anotan en un fichero y se guardan en Supabase en segundo plano.
+# Ruta del fichero, filas por envío, segundos entre comprobaciones y espera máxima
+# entre reintentos cuando Supabase no responde
+DIARIO_LOCAL = str(_get_config("DIARIO_LOCAL", "false")).lower() == "true"
+DIARIO_RUTA = _get_config("DIARIO_RUTA", "diario_registro.jsonl")
+DIARIO_TAMANO_LOTE = int(_get_config("DIARIO_TAMANO_LOTE", 200))
+DIARIO_INTERVALO = float(_get_config("DIARIO_INTERVALO", 5))
+DIARIO_ESPERA_MAX = float(_get_config("DIARIO_ESPERA_MAX", 60))
 
 # Configuración de Streamlit
 APP_NAME = "Gestión de Gimnasio"
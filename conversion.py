@@ -0,0 +1,41 @@
+import pandas as pd
+
+from instrumentacion import instrumentar
+
+# Columnas del DataFrame de registro de actividades
+COLUMNAS_REGISTRO = ["ID", "Fecha", "NIP", "Miembro", "Actividad", "Turno", "Monitor", "Observaciones"]
+
+# Columnas con etiquetas muy repetidas que se guardan como categorías
+COLUMNAS_CATEGORICAS = ["Miembro", "Actividad", "Turno", "Monitor"]
+
+# Columnas que se necesitan del JSON aplanado
+_COLUMNAS_PLANAS = [
+    "id", "fecha", "observaciones",
+    "miembros.nip", "miembros.nombre", "miembros.apellidos",
+    "actividades.nombre", "turnos.nombre",
+    "monitores.nombre", "monitores.apellidos"
+]
+
+@instrumentar("conversion")
+def registros_a_dataframe(registros):
+    """Convierte registros de actividades de Supabase en un DataFrame tipado"""
+    if not registros:
+        return pd.DataFrame(columns=COLUMNAS_REGISTRO).astype(
+            {columna: "category" for columna in COLUMNAS_CATEGORICAS}
+        )
+
+    # Aplanar los objetos embebidos en una sola pasada por columnas
+    plano = pd.json_normalize(registros).reindex(columns=_COLUMNAS_PLANAS)
+
+    df = pd.DataFrame({
+        "ID": plano["id"],
+        "Fecha": plano["fecha"],
+        "NIP": plano["miembros.nip"],
+        "Miembro": plano["miembros.nombre"].str.cat(plano["miembros.apellidos"], sep=" "),
+        "Actividad": plano["actividades.nombre"],
+        "Turno": plano["turnos.nombre"],
+        "Monitor": plano["monitores.nombre"].str.cat(plano["monitores.apellidos"], sep=" "),
+        "Observaciones": plano["observaciones"].fillna("")
+    })
+
+    return df.astype({columna: "category" for columna in COLUMNAS_CATEGORICAS})
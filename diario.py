@@ -0,0 +1,222 @@
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+import eventos
+from cliente import ejecutar
+from instrumentacion import instrumentar
+from perezoso import importar_perezoso
+from config import DIARIO_RUTA, DIARIO_TAMANO_LOTE, DIARIO_INTERVALO, DIARIO_ESPERA_MAX
+
+logger = logging.getLogger(__name__)
+
+postgrest = importar_perezoso("postgrest")
+
+# Diario de escritura diferida del registro de actividades. Cada envío se añade al
+# fichero como una línea JSON por fila (con fsync) y se confirma al momento; un hilo
+# lo guarda en Supabase por lotes. El fichero ".posicion" indica hasta dónde se ha
+# guardado: tras un reinicio solo se reenvía lo pendiente, y como cada fila lleva su
+# clave de idempotencia, reenviar una fila ya guardada no la duplica.
+#
+# Un diario por proceso: dos procesos no deben compartir la misma ruta.
+
+# Resultados que se recuerdan (los más recientes) para informar de cada envío
+_MAX_RESULTADOS = 10_000
+
+_estado = {"ruta": None, "cliente": None, "fichero": None, "error": None, "ultimo_guardado": None, "trabajador": None}
+# Filas pendientes, en orden, con la posición del fichero tras su línea
+_cola = deque()
+_resultados = OrderedDict()
+_lock = threading.Lock()
+_avisar = threading.Event()
+# Se notifica (con _lock) cuando la cola queda vacía
+_vacia = threading.Condition(_lock)
+
+def _ruta_posicion():
+    return _estado["ruta"] + ".posicion"
+
+def _leer_posicion():
+    try:
+        with open(_ruta_posicion(), encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+def _guardar_posicion(posicion):
+    """Guarda la posición de forma atómica (fichero temporal + rename)"""
+    temporal = _ruta_posicion() + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(str(posicion))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, _ruta_posicion())
+
+def iniciar(cliente, ruta=DIARIO_RUTA, intervalo=DIARIO_INTERVALO):
+    """Abre el diario, recupera lo pendiente y arranca el hilo que lo guarda en Supabase"""
+    with _lock:
+        if _estado["fichero"] is not None:
+            _estado["fichero"].close()
+        _estado.update(ruta=ruta, cliente=cliente)
+        fichero = _estado["fichero"] = open(ruta, "a+b")
+        fichero.seek(0)
+        contenido = fichero.read()
+
+        # Una línea incompleta al final es un envío que no llegó a confirmarse
+        completo = contenido.rfind(b"\n") + 1
+        if completo < len(contenido):
+            fichero.truncate(completo)
+
+        posicion = min(_leer_posicion(), completo)
+        _cola.clear()
+        for linea in contenido[posicion:completo].splitlines(keepends=True):
+            posicion += len(linea)
+            _cola.append((json.loads(linea), posicion))
+        if not _cola:
+            _vacia.notify_all()
+
+    if intervalo and _estado["trabajador"] is None:
+        _estado["trabajador"] = threading.Thread(target=_trabajar, args=(intervalo,), name="diario", daemon=True)
+        _estado["trabajador"].start()
+    _avisar.set()
+
+@instrumentar("diario")
+def anotar(filas):
+    """Anota filas de registro_actividades para guardarlas en segundo plano; devuelve sus claves"""
+    filas = [{**fila, "clave_idempotencia": str(uuid.uuid4())} for fila in filas]
+    lineas = [json.dumps(fila, ensure_ascii=False).encode() + b"\n" for fila in filas]
+
+    with _lock:
+        fichero = _estado["fichero"]
+        posicion = fichero.seek(0, os.SEEK_END)
+        fichero.write(b"".join(lineas))
+        fichero.flush()
+        os.fsync(fichero.fileno())
+        for fila, linea in zip(filas, lineas):
+            posicion += len(linea)
+            _cola.append((fila, posicion))
+
+    _avisar.set()
+    return [fila["clave_idempotencia"] for fila in filas]
+
+def _confirmar(lote, estados):
+    """Saca de la cola las filas ya resueltas y avanza la posición guardada"""
+    with _lock:
+        for _ in lote:
+            _cola.popleft()
+        _resultados.update(estados)
+        while len(_resultados) > _MAX_RESULTADOS:
+            _resultados.popitem(last=False)
+        _estado["ultimo_guardado"] = time.time()
+        _estado["error"] = None
+
+        if _cola:
+            _guardar_posicion(lote[-1][1])
+        else:
+            # Todo guardado: se vacía el fichero (antes la posición, así un corte solo provoca reenvíos)
+            _guardar_posicion(0)
+            _estado["fichero"].truncate(0)
+            _vacia.notify_all()
+
+def _es_de_integridad(error):
+    """Violación de una restricción (clase 23 de Postgres): reintentar no sirve"""
+    return str(error.code or "").startswith("23")
+
+def _enviar(filas, operacion):
+    return ejecutar(
+        _estado["cliente"]().table("registro_actividades").upsert(
+            filas, on_conflict="clave_idempotencia", ignore_duplicates=True
+        ),
+        operacion
+    ).data
+
+def _volcar_fila_a_fila(lote):
+    """Guarda un lote con filas conflictivas de una en una, separando las que no se pueden guardar"""
+    for fila, posicion in lote:
+        clave = fila["clave_idempotencia"]
+        try:
+            insertados = _enviar([fila], "diario.guardar_fila")
+            estado = "guardado"
+        except postgrest.APIError as error:
+            if not _es_de_integridad(error):
+                raise
+            if error.code == "23505":
+                # Ya tenía la misma actividad en esa fecha y turno
+                estado, insertados = "duplicado", []
+            else:
+                estado, insertados = "rechazado", []
+                logger.error("Registro rechazado por Supabase (%s): %s", error.message, fila)
+                with open(_estado["ruta"] + ".rechazados", "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"fila": fila, "error": error.message}, ensure_ascii=False) + "\n")
+        eventos.publicar("registro_actividades", "INSERT", insertados)
+        _confirmar([(fila, posicion)], {clave: estado})
+
+def _volcar_lote():
+    """Guarda el siguiente lote de la cola; devuelve False si no había nada pendiente"""
+    with _lock:
+        lote = list(itertools.islice(_cola, DIARIO_TAMANO_LOTE))
+    if not lote:
+        return False
+
+    filas = [fila for fila, _ in lote]
+    try:
+        # Las filas que ya se guardaron en un envío anterior se ignoran por su clave
+        insertados = _enviar(filas, "diario.guardar")
+    except postgrest.APIError as error:
+        # Un conflicto con otra restricción rechaza el lote entero
+        if not _es_de_integridad(error):
+            raise
+        _volcar_fila_a_fila(lote)
+        return True
+
+    # Se notifica antes de confirmar: quien espera a que se vacíe la cola ya ve los cambios
+    eventos.publicar("registro_actividades", "INSERT", insertados)
+    _confirmar(lote, {fila["clave_idempotencia"]: "guardado" for fila in filas})
+    return True
+
+def _trabajar(intervalo):
+    fallos = 0
+    while True:
+        if fallos:
+            # Backoff exponencial con jitter mientras Supabase no responda
+            time.sleep(min(DIARIO_ESPERA_MAX, 2 ** fallos) * random.uniform(0.5, 1))
+        else:
+            _avisar.wait(intervalo)
+            _avisar.clear()
+        try:
+            while _volcar_lote():
+                pass
+        except Exception as error:
+            fallos += 1
+            _estado["error"] = str(error)
+            logger.warning("No se pudo guardar el diario en Supabase (intento %s): %s", fallos, error)
+        else:
+            fallos = 0
+            _estado["error"] = None
+
+def pendientes():
+    """Número de filas anotadas que aún no se han guardado en Supabase"""
+    return len(_cola)
+
+def estado():
+    """Pendientes, último error al guardar (None si el último intento fue bien) y hora del último guardado"""
+    return {"pendientes": len(_cola), "error": _estado["error"], "ultimo_guardado": _estado["ultimo_guardado"]}
+
+def resultados(claves):
+    """Estado de cada clave: None si está pendiente, "guardado", "duplicado", "rechazado" o "desconocido" """
+    with _lock:
+        en_cola = {fila["clave_idempotencia"] for fila, _ in _cola}
+        # Una clave que ya no se recuerda (descartada por _MAX_RESULTADOS o de antes de un
+        # reinicio) puede haberse guardado o no: no se da por guardada
+        return {clave: None if clave in en_cola else _resultados.get(clave, "desconocido") for clave in claves}
+
+def esperar(timeout=None):
+    """Espera a que no quede nada pendiente; devuelve False si se agota el tiempo"""
+    _avisar.set()
+    with _vacia:
+        return _vacia.wait_for(lambda: not _cola, timeout)
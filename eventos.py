@@ -0,0 +1,43 @@
+import logging
+import threading
+from collections import defaultdict, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Cambio en una tabla: tipo es "INSERT", "UPDATE" o "DELETE" y filas las filas afectadas
+Evento = namedtuple("Evento", ["tabla", "tipo", "filas"])
+
+_suscriptores = defaultdict(list)
+_lock = threading.Lock()
+
+def suscribir(tabla, funcion):
+    """Llama a funcion(evento) con cada cambio publicado sobre la tabla (en el hilo que lo publica)"""
+    with _lock:
+        _suscriptores[tabla].append(funcion)
+
+def cancelar(tabla, funcion):
+    """Deja de notificar a funcion los cambios de la tabla"""
+    with _lock:
+        if funcion in _suscriptores[tabla]:
+            _suscriptores[tabla].remove(funcion)
+
+def publicar(tabla, tipo, filas):
+    """Notifica un cambio a todos los suscriptores de la tabla del proceso"""
+    if not filas:
+        return
+    evento = Evento(tabla, tipo, list(filas))
+    with _lock:
+        suscriptores = list(_suscriptores[tabla])
+    for funcion in suscriptores:
+        # Un suscriptor con errores no impide notificar al resto ni la escritura que publica
+        try:
+            funcion(evento)
+        except Exception:
+            logger.exception("Error al notificar %s de %s a %s", tipo, tabla, funcion)
+
+def desde_realtime(mensaje):
+    """Publica un mensaje de cambios de Supabase Realtime (postgres_changes) en el bus local"""
+    datos = mensaje.get("data", mensaje)
+    tipo = datos.get("eventType") or datos.get("type")
+    fila = datos.get("old") or datos.get("old_record") if tipo == "DELETE" else datos.get("new") or datos.get("record")
+    publicar(datos["table"], tipo, [fila] if fila else [])
@@ -0,0 +1,93 @@
+import gzip
+import io
+
+import pandas as pd
+
+from conversion import registros_a_dataframe
+from instrumentacion import instrumentar
+
+# Formatos de exportación: extensión y tipo MIME
+FORMATOS = {
+    "csv": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet")
+}
+
+# Columnas exportadas (el ID interno no se exporta)
+COLUMNAS_EXPORTACION = ["Fecha", "NIP", "Miembro", "Actividad", "Turno", "Monitor", "Observaciones"]
+
+# Columnas con pocos valores distintos que Parquet guarda con codificación de diccionario
+COLUMNAS_DICCIONARIO = ["Miembro", "Actividad", "Turno", "Monitor"]
+
+# Filas por grupo de filas de Parquet: grupos más grandes comprimen mejor, a costa de memoria
+FILAS_POR_GRUPO = 50_000
+
+def _dataframes(paginas):
+    """Convierte cada página de registros en un DataFrame con las columnas exportadas"""
+    for pagina in paginas:
+        yield registros_a_dataframe(pagina)[COLUMNAS_EXPORTACION]
+
+@instrumentar("exportacion")
+def exportar_csv(paginas, destino=None):
+    """Escribe las páginas de registros en un CSV comprimido con gzip, página a página"""
+    destino = destino if destino is not None else io.BytesIO()
+    filas = 0
+
+    # GzipFile no cierra el destino al cerrarse; solo se comprime una página cada vez
+    with gzip.GzipFile(fileobj=destino, mode="wb", compresslevel=6) as comprimido:
+        with io.TextIOWrapper(comprimido, encoding="utf-8", newline="") as texto:
+            for df in _dataframes(paginas):
+                df.to_csv(texto, header=filas == 0, index=False)
+                filas += len(df)
+
+            if filas == 0:
+                texto.write(",".join(COLUMNAS_EXPORTACION) + "\n")
+
+    destino.seek(0)
+    return destino
+
+def _esquema_parquet(pa):
+    """Esquema fijo para que todas las páginas escriban en el mismo fichero"""
+    return pa.schema([
+        ("Fecha", pa.date32()),
+        ("NIP", pa.int64()),
+        *[(columna, pa.dictionary(pa.int32(), pa.string())) for columna in COLUMNAS_DICCIONARIO],
+        ("Observaciones", pa.string())
+    ])
+
+@instrumentar("exportacion")
+def exportar_parquet(paginas, destino=None):
+    """Escribe las páginas de registros en Parquet, un grupo de filas por página"""
+    # pyarrow solo se importa al exportar
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    destino = destino if destino is not None else io.BytesIO()
+    esquema = _esquema_parquet(pa)
+
+    def a_tabla(df):
+        return pa.Table.from_pandas(
+            df.assign(Fecha=pd.to_datetime(df["Fecha"]).dt.date), schema=esquema, preserve_index=False
+        )
+
+    with pq.ParquetWriter(destino, esquema, compression="zstd", use_dictionary=COLUMNAS_DICCIONARIO) as escritor:
+        # Se acumulan páginas hasta completar un grupo de filas
+        pendientes = []
+        filas = 0
+        for df in _dataframes(paginas):
+            pendientes.append(a_tabla(df))
+            filas += len(df)
+            if filas >= FILAS_POR_GRUPO:
+                escritor.write_table(pa.concat_tables(pendientes).unify_dictionaries())
+                pendientes = []
+                filas = 0
+        if pendientes:
+            escritor.write_table(pa.concat_tables(pendientes).unify_dictionaries())
+
+    destino.seek(0)
+    return destino
+
+def exportar(paginas, formato, destino=None):
+    """Exporta las páginas de registros en el formato indicado ("csv" o "parquet")"""
+    if formato == "parquet":
+        return exportar_parquet(paginas, destino)
+    return exportar_csv(paginas, destino)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+import instrumentacion
+from config import FIGURAS_CACHE_MAX
+
+logger = logging.getLogger(__name__)
+
+# Figuras ya construidas y serializadas, de la menos a la más usada recientemente (compartidas entre sesiones)
+_figuras = OrderedDict()
+_lock = threading.Lock()
+
+# Si se ha avisado ya de que se dibuja con st.plotly_chart (ver mostrar_figura)
+_estado = {"aviso_api_publica": False}
+
+def huella(df):
+    """Huella de un DataFrame: columnas, tipos, índice y valores"""
+    h = hashlib.sha1()
+    h.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def figura(funcion, df, nombre, **parametros):
+    """Especificación JSON de la figura de plotly express funcion(df, **parametros), reutilizada si los datos no han cambiado"""
+    inicio = time.perf_counter()
+    clave = (funcion.__name__, huella(df), json.dumps(parametros, sort_keys=True, default=str))
+
+    with _lock:
+        spec = _figuras.get(clave)
+        if spec is not None:
+            _figuras.move_to_end(clave)
+
+    if spec is not None:
+        instrumentacion.registrar(f"plotly.{nombre}.cache", time.perf_counter() - inicio)
+        return spec
+
+    import plotly.utils
+
+    with instrumentacion.medir(f"plotly.{nombre}"):
+        # Se guarda serializada: validar y serializar la figura es lo que st.plotly_chart
+        # repetiría en cada ejecución aunque la figura ya estuviera construida
+        spec = json.dumps(funcion(df, **parametros).to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
+
+    with _lock:
+        _figuras[clave] = spec
+        while len(_figuras) > FIGURAS_CACHE_MAX:
+            _figuras.popitem(last=False)
+
+    return spec
+
+def _config(config):
+    """Configuración de la figura tal como la envía st.plotly_chart"""
+    config = dict(config or {})
+    config.setdefault("showLink", False)
+    config.setdefault("linkText", False)
+    return json.dumps(config)
+
+def mostrar_figura(spec, use_container_width=True, theme="streamlit", config=None):
+    """Dibuja una figura devuelta por figura(), como st.plotly_chart pero sin volver a validarla ni serializarla"""
+    # st.plotly_chart valida y serializa la figura en cada ejecución (más aún si se le pasa
+    # la especificación JSON), así que se envía su mismo mensaje con la especificación guardada
+    try:
+        from streamlit.proto.PlotlyChart_pb2 import PlotlyChart
+
+        encolar = st._main._enqueue
+        proto = PlotlyChart()
+        proto.use_container_width = use_container_width
+        proto.theme = theme or ""
+        proto.figure.spec = spec
+        proto.figure.config = _config(config)
+    except (ImportError, AttributeError):
+        # Otra versión de Streamlit sin ese mensaje o método: se usa la API pública
+        if not _estado["aviso_api_publica"]:
+            _estado["aviso_api_publica"] = True
+            logger.warning("Las figuras se dibujan con st.plotly_chart: esta versión de Streamlit no admite el envío directo")
+        import plotly.io
+        st.plotly_chart(
+            plotly.io.from_json(spec), use_container_width=use_container_width, theme=theme, config=config or {}
+        )
+        return
+
+    # En el contenedor activo (columna, pestaña...), igual que st.plotly_chart
+    encolar("plotly_chart", proto)
+
+def vaciar():
+    """Descarta todas las figuras guardadas"""
+    with _lock:
+        _figuras.clear()
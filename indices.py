@@ -0,0 +1,10 @@
+def indice_por_id(elementos, etiqueta=lambda e: e["nombre"]):
+    """Construye un índice id -> etiqueta para usar como opciones y format_func de los selectores"""
+    return {e["id"]: etiqueta(e) for e in elementos}
+
+def posicion(indice, id, default=0):
+    """Posición de un id dentro de las opciones de un índice"""
+    for i, clave in enumerate(indice):
+        if clave == id:
+            return i
+    return default
@@ -0,0 +1,188 @@
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (ms) de los intervalos del histograma de latencias
+LIMITES_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_metricas = {}
+_lock = threading.Lock()
+
+def _nueva_metrica():
+    return {
+        "llamadas": 0,
+        "errores": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "filas": 0,
+        # Un intervalo más para las latencias por encima del último límite
+        "histograma": [0] * (len(LIMITES_MS) + 1)
+    }
+
+def registrar(nombre, segundos, filas=None, error=False):
+    """Registra una llamada: latencia, filas devueltas y si terminó en error"""
+    ms = segundos * 1000
+    with _lock:
+        metrica = _metricas.get(nombre)
+        if metrica is None:
+            metrica = _metricas[nombre] = _nueva_metrica()
+        metrica["llamadas"] += 1
+        metrica["total_ms"] += ms
+        metrica["max_ms"] = max(metrica["max_ms"], ms)
+        metrica["histograma"][bisect_left(LIMITES_MS, ms)] += 1
+        if filas is not None:
+            metrica["filas"] += filas
+        if error:
+            metrica["errores"] += 1
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({
+            "evento": "llamada",
+            "nombre": nombre,
+            "ms": round(ms, 2),
+            "filas": filas,
+            "error": error
+        }))
+
+def _contar_filas(resultado):
+    """Número de filas de un resultado (listas y DataFrames)"""
+    if isinstance(resultado, (list, dict)) or hasattr(resultado, "shape"):
+        return len(resultado)
+    return None
+
+@contextmanager
+def medir(nombre):
+    """Mide la duración de un bloque de código"""
+    inicio = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        registrar(nombre, time.perf_counter() - inicio, error=error)
+
+def instrumentar(categoria):
+    """Decorador que registra llamadas, latencia y filas devueltas con el nombre categoria.funcion"""
+    def decorador(funcion):
+        nombre = f"{categoria}.{funcion.__name__}"
+
+        if inspect.isgeneratorfunction(funcion):
+            # En los generadores se mide el recorrido completo y se suman las filas de cada página
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                filas = 0
+                error = False
+                try:
+                    for pagina in funcion(*args, **kwargs):
+                        filas += _contar_filas(pagina) or 0
+                        yield pagina
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    registrar(nombre, time.perf_counter() - inicio, filas=filas, error=error)
+        else:
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                resultado = None
+                error = False
+                try:
+                    resultado = funcion(*args, **kwargs)
+                    return resultado
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    # st.rerun()/st.stop() y el cierre anticipado de un generador no cuentan como error
+                    registrar(nombre, time.perf_counter() - inicio, filas=_contar_filas(resultado), error=error)
+
+        if hasattr(funcion, "clear"):
+            envoltura.clear = funcion.clear
+        return envoltura
+
+    return decorador
+
+def _percentil(histograma, llamadas, p):
+    """Percentil aproximado (límite superior del intervalo) a partir del histograma"""
+    objetivo = llamadas * p / 100
+    acumulado = 0
+    for i, cantidad in enumerate(histograma):
+        acumulado += cantidad
+        if acumulado >= objetivo:
+            return LIMITES_MS[i] if i < len(LIMITES_MS) else float("inf")
+    return float("inf")
+
+def get_metricas(prefijo=""):
+    """Devuelve una copia de las métricas, con media y percentiles, filtrando por prefijo"""
+    with _lock:
+        resultado = {}
+        for nombre, metrica in sorted(_metricas.items()):
+            if not nombre.startswith(prefijo):
+                continue
+            llamadas = metrica["llamadas"]
+            resultado[nombre] = {
+                **metrica,
+                "histograma": list(metrica["histograma"]),
+                "media_ms": metrica["total_ms"] / llamadas if llamadas else 0.0,
+                "p50_ms": _percentil(metrica["histograma"], llamadas, 50),
+                "p95_ms": _percentil(metrica["histograma"], llamadas, 95),
+                "filas_por_llamada": metrica["filas"] / llamadas if llamadas else 0.0
+            }
+        return resultado
+
+def reiniciar():
+    """Borra todas las métricas"""
+    with _lock:
+        _metricas.clear()
+
+def exportar_json():
+    """Exporta las métricas como JSON"""
+    return json.dumps({
+        "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "limites_ms": LIMITES_MS,
+        "metricas": get_metricas()
+    }, ensure_ascii=False, indent=2)
+
+def mostrar_panel():
+    """Panel de rendimiento para la barra lateral"""
+    with st.expander("Rendimiento"):
+        metricas = get_metricas()
+        if not metricas:
+            st.caption("Sin datos todavía")
+            return
+
+        st.dataframe(
+            pd.DataFrame([{
+                "Nombre": nombre,
+                "Llamadas": m["llamadas"],
+                "Errores": m["errores"],
+                "Media (ms)": round(m["media_ms"], 1),
+                "p50 (ms)": m["p50_ms"],
+                "p95 (ms)": m["p95_ms"],
+                "Máx (ms)": round(m["max_ms"], 1),
+                "Filas/llamada": round(m["filas_por_llamada"], 1)
+            } for nombre, m in metricas.items()]),
+            use_container_width=True
+        )
+
+        # Sin botón de reinicio: las métricas son del proceso y se borrarían para todos los monitores
+        st.download_button(
+            "Exportar JSON",
+            data=exportar_json(),
+            file_name="metricas_rendimiento.json",
+            mime="application/json"
+        )
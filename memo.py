@@ -0,0 +1,73 @@
+import functools
+from collections import defaultdict
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Claves en st.session_state
+_CLAVE_MEMO = "_memo_consultas"
+_CLAVE_PAGINA = "_memo_pagina"
+_CLAVE_AHORRADAS = "_memo_ahorradas"
+_CLAVE_AHORRADAS_EJECUCION = "_memo_ahorradas_ejecucion"
+
+def iniciar_ejecucion(pagina=None):
+    """Vacía la memoria de consultas al comenzar una ejecución del script"""
+    st.session_state[_CLAVE_MEMO] = {}
+    st.session_state[_CLAVE_AHORRADAS_EJECUCION] = 0
+    set_pagina(pagina)
+
+def terminar_ejecucion():
+    """Descarta la memoria de consultas al acabar la ejecución: una sesión inactiva no conserva resultados"""
+    st.session_state.pop(_CLAVE_MEMO, None)
+
+def set_pagina(pagina):
+    """Indica la página que se está mostrando, para el contador de consultas ahorradas"""
+    st.session_state[_CLAVE_PAGINA] = pagina
+
+def consultas_ahorradas():
+    """Devuelve (ahorradas en esta ejecución, acumuladas por página en la sesión)"""
+    return (
+        st.session_state.get(_CLAVE_AHORRADAS_EJECUCION, 0),
+        dict(st.session_state.get(_CLAVE_AHORRADAS, {}))
+    )
+
+def _memo_activa():
+    """La memoria solo existe dentro de una ejecución de Streamlit ya iniciada"""
+    return get_script_run_ctx() is not None and _CLAVE_MEMO in st.session_state
+
+def memo_ejecucion(funcion):
+    """Memoriza el resultado de una consulta por función y argumentos durante una ejecución del script"""
+    nombre = funcion.__qualname__
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not _memo_activa():
+            return funcion(*args, **kwargs)
+
+        clave = (nombre, args, tuple(sorted(kwargs.items())))
+        memo = st.session_state[_CLAVE_MEMO]
+        try:
+            if clave in memo:
+                ahorradas = st.session_state.setdefault(_CLAVE_AHORRADAS, defaultdict(int))
+                ahorradas[st.session_state.get(_CLAVE_PAGINA)] += 1
+                st.session_state[_CLAVE_AHORRADAS_EJECUCION] += 1
+                return memo[clave]
+        except TypeError:
+            # Argumentos no hashables: no se memoriza
+            return funcion(*args, **kwargs)
+
+        resultado = funcion(*args, **kwargs)
+        memo[clave] = resultado
+        return resultado
+
+    def clear():
+        """Olvida los resultados memorizados de la función y vacía su caché"""
+        if _memo_activa():
+            memo = st.session_state[_CLAVE_MEMO]
+            for clave in [clave for clave in memo if clave[0] == nombre]:
+                del memo[clave]
+        if hasattr(funcion, "clear"):
+            funcion.clear()
+
+    envoltura.clear = clear
+    return envoltura
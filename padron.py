@@ -0,0 +1,144 @@
+import sys
+from array import array
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import database as db
+import eventos
+from instrumentacion import instrumentar
+from config import CACHE_TTL
+
+# Padrón de miembros activos compartido por todas las sesiones del proceso. Cada
+# columna es un array compacto y la sección y el grupo se guardan como códigos
+# enteros sobre tablas de nombres comunes, en lugar de una lista de dicts anidados
+# que cada sesión recibe copiada de la caché (st.cache_data copia en cada llamada).
+#
+# Un padrón no se modifica: al cambiar los miembros se construye otro, y las
+# sesiones que aún usan el anterior lo siguen leyendo sin bloqueos.
+
+class _TablaNombres:
+    """Nombres de secciones o grupos con un código entero por id, en orden de aparición"""
+    __slots__ = ("ids", "nombres", "_codigos")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.nombres = []
+        self._codigos = {}
+
+    def codificar(self, elemento):
+        """Código del elemento embebido ({"id", "nombre"}), añadiéndolo si es nuevo"""
+        codigo = self._codigos.get(elemento["id"])
+        if codigo is None:
+            codigo = self._codigos[elemento["id"]] = len(self.nombres)
+            self.ids.append(elemento["id"])
+            self.nombres.append(elemento["nombre"])
+        return codigo
+
+    def codigo(self, id):
+        """Código de un id, o -1 si ningún miembro lo tiene"""
+        return self._codigos.get(id, -1)
+
+    def indice(self):
+        """Índice id -> nombre para usar como opciones y format_func de los selectores"""
+        return dict(zip(self.ids, self.nombres))
+
+class Padron:
+    """Miembros activos por columnas: id, NIP, nombre, apellidos y códigos de sección y grupo"""
+    __slots__ = ("ids", "nips", "nombres", "apellidos", "seccion", "grupo", "secciones", "grupos", "_posiciones")
+
+    def __init__(self, miembros):
+        self.ids = array("q")
+        self.nips = array("q")
+        self.nombres = []
+        self.apellidos = []
+        self.seccion = array("i")
+        self.grupo = array("i")
+        self.secciones = _TablaNombres()
+        self.grupos = _TablaNombres()
+
+        for miembro in miembros:
+            self.ids.append(miembro["id"])
+            self.nips.append(miembro["nip"])
+            # Los nombres y apellidos repetidos comparten la misma cadena
+            self.nombres.append(sys.intern(miembro["nombre"]))
+            self.apellidos.append(sys.intern(miembro["apellidos"]))
+            self.seccion.append(self.secciones.codificar(miembro["secciones"]))
+            self.grupo.append(self.grupos.codificar(miembro["grupos"]))
+
+        self._posiciones = {id: i for i, id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        return id in self._posiciones
+
+    def filtrar(self, seccion_id=None, grupo_id=None):
+        """Posiciones de los miembros de la sección y el grupo indicados (None = todos)"""
+        mascara = np.ones(len(self), dtype=bool)
+        if seccion_id is not None:
+            mascara &= np.frombuffer(self.seccion, dtype=np.intc) == self.secciones.codigo(seccion_id)
+        if grupo_id is not None:
+            mascara &= np.frombuffer(self.grupo, dtype=np.intc) == self.grupos.codigo(grupo_id)
+        return np.flatnonzero(mascara)
+
+    def ids_en(self, posiciones):
+        """Ids de los miembros en las posiciones indicadas"""
+        return np.frombuffer(self.ids, dtype=np.int64)[posiciones].tolist()
+
+    def etiqueta(self, id, defecto=None):
+        """Etiqueta de un miembro en los selectores ("NIP - Nombre Apellidos"); defecto si no está"""
+        i = self._posiciones.get(id)
+        if i is None:
+            if defecto is None:
+                raise KeyError(id)
+            return defecto
+        return f"{self.nips[i]} - {self.nombres[i]} {self.apellidos[i]}"
+
+    def miembro(self, id):
+        """Miembro con la misma forma que devuelve database.get_miembros, o None si no está"""
+        i = self._posiciones.get(id)
+        if i is None:
+            return None
+        seccion, grupo = self.seccion[i], self.grupo[i]
+        return {
+            "id": self.ids[i],
+            "nip": self.nips[i],
+            "nombre": self.nombres[i],
+            "apellidos": self.apellidos[i],
+            "secciones": {"id": self.secciones.ids[seccion], "nombre": self.secciones.nombres[seccion]},
+            "grupos": {"id": self.grupos.ids[grupo], "nombre": self.grupos.nombres[grupo]}
+        }
+
+    def a_dataframe(self, posiciones=None):
+        """Tabla de miembros (ID, NIP, Nombre, Apellidos, Sección, Grupo) de las posiciones indicadas"""
+        if posiciones is None:
+            posiciones = np.arange(len(self))
+        nombres = np.asarray(self.nombres, dtype=object)
+        apellidos = np.asarray(self.apellidos, dtype=object)
+        return pd.DataFrame({
+            "ID": np.frombuffer(self.ids, dtype=np.int64)[posiciones],
+            "NIP": np.frombuffer(self.nips, dtype=np.int64)[posiciones],
+            "Nombre": nombres[posiciones],
+            "Apellidos": apellidos[posiciones],
+            "Sección": _categorias(np.frombuffer(self.seccion, dtype=np.intc)[posiciones], self.secciones.nombres),
+            "Grupo": _categorias(np.frombuffer(self.grupo, dtype=np.intc)[posiciones], self.grupos.nombres)
+        })
+
+def _categorias(codigos, nombres):
+    """Columna categórica a partir de los códigos; las secciones o grupos con el mismo nombre se unen"""
+    categorias, codigos_nombre = np.unique(np.asarray(nombres, dtype=object), return_inverse=True)
+    return pd.Categorical.from_codes(codigos_nombre[codigos], categorias)
+
+@instrumentar("padron")
+@st.cache_resource(ttl=CACHE_TTL, show_spinner=False)
+def get_padron():
+    """Padrón de los miembros activos, compartido por todas las sesiones"""
+    return Padron(db.get_miembros())
+
+def _al_cambiar_miembros(evento):
+    get_padron.clear()
+
+eventos.suscribir("miembros", _al_cambiar_miembros)
@@ -0,0 +1,14 @@
+import importlib
+import sys
+import types
+
+class _ModuloPerezoso(types.ModuleType):
+    """Sustituto de un módulo que lo importa al acceder por primera vez a uno de sus atributos"""
+
+    def __getattr__(self, atributo):
+        # import_module ya serializa la importación entre hilos; después es una consulta a sys.modules
+        return getattr(importlib.import_module(self.__name__), atributo)
+
+def importar_perezoso(nombre):
+    """Devuelve el módulo si ya está importado o un sustituto que lo importa en el primer uso"""
+    return sys.modules.get(nombre) or _ModuloPerezoso(nombre)
@@ -0,0 +1,16 @@
+import streamlit as st
+
+def _clave_pendiente(key):
+    return f"_{key}_pendiente"
+
+def pestanas_perezosas(etiquetas, key):
+    """Selector de pestañas que devuelve solo la activa, para consultar y dibujar únicamente su contenido"""
+    # st.tabs ejecuta el cuerpo de todas las pestañas en cada ejecución; con un radio solo se ejecuta la elegida
+    pendiente = st.session_state.pop(_clave_pendiente(key), None)
+    if pendiente is not None:
+        st.session_state[key] = pendiente
+    return st.radio("Vista", etiquetas, key=key, horizontal=True, label_visibility="collapsed")
+
+def mostrar_pestana(key, etiqueta):
+    """Activa una pestaña en la próxima ejecución (el widget ya no se puede modificar en esta)"""
+    st.session_state[_clave_pendiente(key)] = etiqueta
@@ -0,0 +1,377 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import eventos
+from cliente import ejecutar
+from instrumentacion import instrumentar
+from config import (
+    REPLICA_RUTA, REPLICA_DIAS_REGISTRO, REPLICA_INTERVALO, REPLICA_TAMANO_PAGINA, REPLICA_SOLAPE
+)
+
+logger = logging.getLogger(__name__)
+
+# Réplica local en SQLite de las tablas que lee la aplicación. Se sincroniza por
+# deltas: cada tabla guarda la marca (updated_at, id) de la última fila recibida y
+# pide a Supabase solo las posteriores. Las lecturas de database se sirven desde
+# aquí mientras la réplica esté completa, también sin conexión.
+#
+# Cada fila se guarda completa como JSON en "datos", más las columnas por las que
+# se filtra, ordena o relaciona, con sus índices.
+_TABLAS = {
+    "secciones": {"select": ("*",), "columnas": ()},
+    "grupos": {"select": ("*",), "columnas": ()},
+    "turnos": {"select": ("*",), "columnas": ()},
+    "actividades": {"select": ("*",), "columnas": ("activo",)},
+    # De los monitores solo lo que se muestra (ni email ni contraseña)
+    "monitores": {"select": ("id", "nombre", "apellidos", "updated_at"), "columnas": ()},
+    "miembros": {"select": ("*",), "columnas": ("activo", "seccion_id", "grupo_id")},
+    "registro_actividades": {
+        "select": ("*",),
+        "columnas": ("fecha", "miembro_id", "actividad_id", "turno_id", "monitor_id")
+    }
+}
+
+_INDICES = (
+    "CREATE INDEX IF NOT EXISTS actividades_activo_idx ON actividades (activo, id)",
+    "CREATE INDEX IF NOT EXISTS miembros_activo_idx ON miembros (activo, id)",
+    "CREATE INDEX IF NOT EXISTS registro_fecha_idx ON registro_actividades (fecha, id)",
+    "CREATE INDEX IF NOT EXISTS registro_miembro_fecha_idx ON registro_actividades (miembro_id, fecha)"
+)
+
+# Columnas de get_registro_actividades, con los recursos embebidos, en SQL
+_SELECT_REGISTRO = """
+    SELECT
+        r.id, r.fecha, json_extract(r.datos, '$.observaciones'),
+        m.id, json_extract(m.datos, '$.nip'), json_extract(m.datos, '$.nombre'), json_extract(m.datos, '$.apellidos'),
+        a.id, json_extract(a.datos, '$.nombre'),
+        t.id, json_extract(t.datos, '$.nombre'),
+        mo.id, json_extract(mo.datos, '$.nombre'), json_extract(mo.datos, '$.apellidos')
+    FROM registro_actividades r
+    {union} JOIN miembros m ON m.id = r.miembro_id
+    LEFT JOIN actividades a ON a.id = r.actividad_id
+    LEFT JOIN turnos t ON t.id = r.turno_id
+    LEFT JOIN monitores mo ON mo.id = r.monitor_id
+"""
+
+_estado = {"ruta": None, "cliente": None, "lista": False, "trabajador": None}
+_local = threading.local()
+_lock_escritura = threading.Lock()
+_lock_sincronizacion = threading.Lock()
+_despertar = threading.Event()
+
+# Conexiones libres, compartidas por todos los hilos: Streamlit usa un hilo nuevo en
+# cada ejecución y consultar_en_paralelo otros tantos, así que una conexión por hilo
+# se abriría en cada ejecución. Las que sobran al devolverlas se cierran
+_MAX_CONEXIONES_LIBRES = 4
+_conexiones_libres = []
+_lock_conexiones = threading.Lock()
+
+@contextmanager
+def _conexion():
+    """Conexión a la réplica para usar dentro del bloque (de un solo hilo a la vez)"""
+    ruta = _estado["ruta"]
+    with _lock_conexiones:
+        libre = next((i for i, (r, _) in enumerate(_conexiones_libres) if r == ruta), None)
+        conexion = _conexiones_libres.pop(libre)[1] if libre is not None else None
+    if conexion is None:
+        conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+
+    try:
+        yield conexion
+    finally:
+        with _lock_conexiones:
+            if ruta == _estado["ruta"] and len(_conexiones_libres) < _MAX_CONEXIONES_LIBRES:
+                _conexiones_libres.append((ruta, conexion))
+                conexion = None
+        if conexion is not None:
+            conexion.close()
+
+def _cerrar_conexiones():
+    """Cierra las conexiones libres (p. ej. al cambiar de fichero)"""
+    with _lock_conexiones:
+        libres = [conexion for _, conexion in _conexiones_libres]
+        _conexiones_libres.clear()
+    for conexion in libres:
+        conexion.close()
+
+def _crear_esquema(conexion):
+    with conexion:
+        for tabla, definicion in _TABLAS.items():
+            columnas = "".join(f", {columna}" for columna in definicion["columnas"])
+            conexion.execute(
+                f"CREATE TABLE IF NOT EXISTS {tabla} (id INTEGER PRIMARY KEY, updated_at TEXT, datos TEXT NOT NULL{columnas})"
+            )
+        for indice in _INDICES:
+            conexion.execute(indice)
+        # Última fila recibida de cada tabla; cobertura es la primera fecha de registro replicada
+        conexion.execute(
+            "CREATE TABLE IF NOT EXISTS marcas (tabla TEXT PRIMARY KEY, updated_at TEXT, id INTEGER, cobertura TEXT)"
+        )
+
+def _completa(conexion):
+    """Indica si todas las tablas se han sincronizado al menos una vez"""
+    sincronizadas = {fila[0] for fila in conexion.execute("SELECT tabla FROM marcas")}
+    return sincronizadas >= set(_TABLAS)
+
+def iniciar(cliente, ruta=REPLICA_RUTA, intervalo=REPLICA_INTERVALO):
+    """Activa la réplica; cliente es una función que devuelve el cliente de Supabase actual"""
+    _estado.update(ruta=ruta, cliente=cliente)
+    _cerrar_conexiones()
+    with _conexion() as conexion:
+        _crear_esquema(conexion)
+        # Con una réplica ya completa de una ejecución anterior se puede leer desde el primer momento
+        _estado["lista"] = _completa(conexion)
+
+    if intervalo and _estado["trabajador"] is None:
+        _estado["trabajador"] = threading.Thread(
+            target=_sincronizar_periodicamente, args=(intervalo,), name="replica", daemon=True
+        )
+        _estado["trabajador"].start()
+
+def disponible():
+    """Indica si las lecturas se pueden servir desde la réplica"""
+    return _estado["lista"]
+
+def _sincronizar_periodicamente(intervalo):
+    while True:
+        try:
+            sincronizar()
+        except Exception as error:
+            # Sin conexión se sigue leyendo de la réplica; se reintenta en el siguiente intervalo
+            logger.warning("No se pudo sincronizar la réplica local: %s", error)
+        _despertar.wait(intervalo)
+        _despertar.clear()
+
+def sincronizar_pronto():
+    """Adelanta la próxima sincronización periódica"""
+    _despertar.set()
+
+def _limite_registro():
+    return (date.today() - timedelta(days=REPLICA_DIAS_REGISTRO)).isoformat()
+
+def _es_anterior(fila, horizonte):
+    return datetime.fromisoformat(fila["updated_at"]) <= horizonte
+
+def _guardar(conexion, tabla, filas, fusionar=False):
+    """Inserta o sustituye filas; devuelve las que son nuevas o han cambiado"""
+    columnas = _TABLAS[tabla]["columnas"]
+    ids = [fila["id"] for fila in filas]
+    existentes = {}
+    for inicio in range(0, len(ids), 500):
+        lote = ids[inicio:inicio + 500]
+        existentes.update(
+            (id, (updated_at, datos)) for id, updated_at, datos in conexion.execute(
+                f"SELECT id, updated_at, datos FROM {tabla} WHERE id IN ({','.join('?' * len(lote))})", lote
+            )
+        )
+
+    cambiadas = []
+    valores = []
+    for fila in filas:
+        existente = existentes.get(fila["id"])
+        if existente is not None:
+            if fila.get("updated_at") and fila["updated_at"] == existente[0]:
+                continue
+            if fusionar:
+                # Las filas de los eventos pueden traer solo las columnas modificadas
+                fila = {**json.loads(existente[1]), **fila}
+        cambiadas.append(fila)
+        valores.append((fila["id"], fila.get("updated_at"), json.dumps(fila), *(fila.get(c) for c in columnas)))
+
+    if valores:
+        nombres = ", ".join(("id", "updated_at", "datos") + columnas)
+        conexion.executemany(
+            f"INSERT OR REPLACE INTO {tabla} ({nombres}) VALUES ({', '.join('?' * (3 + len(columnas)))})",
+            valores
+        )
+    return cambiadas
+
+def _sincronizar_tabla(tabla):
+    """Pide las filas posteriores a la marca de la tabla; devuelve las nuevas o modificadas"""
+    with _conexion() as conexion:
+        return _sincronizar_tabla_en(conexion, tabla)
+
+def _sincronizar_tabla_en(conexion, tabla):
+    marca = conexion.execute("SELECT updated_at, id FROM marcas WHERE tabla = ?", (tabla,)).fetchone()
+    desde = marca if marca and marca[0] else None
+    # Una transacción larga puede confirmar filas con updated_at anterior a otras ya
+    # recibidas: la marca no pasa de hace REPLICA_SOLAPE segundos, así que las filas
+    # más recientes se vuelven a pedir (y solo se notifican si han cambiado)
+    horizonte = datetime.now(timezone.utc) - timedelta(seconds=REPLICA_SOLAPE)
+    cobertura = _limite_registro() if tabla == "registro_actividades" else None
+    cambiadas = []
+
+    while True:
+        query = _estado["cliente"]().table(tabla).select(*_TABLAS[tabla]["select"])
+        if cobertura:
+            query = query.gte("fecha", cobertura)
+        if desde:
+            # postgrest-py 0.10 no expone or_(); las marcas de tiempo van entre comillas
+            query.params = query.params.add(
+                "or", f'(updated_at.gt."{desde[0]}",and(updated_at.eq."{desde[0]}",id.gt.{desde[1]}))'
+            )
+        response = ejecutar(query.order("updated_at,id").limit(REPLICA_TAMANO_PAGINA), f"replica.{tabla}")
+        filas = response.data
+
+        with _lock_escritura, conexion:
+            cambiadas.extend(_guardar(conexion, tabla, filas))
+            seguras = [fila for fila in filas if _es_anterior(fila, horizonte)]
+            if seguras:
+                conexion.execute(
+                    "INSERT INTO marcas (tabla, updated_at, id, cobertura) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (tabla) DO UPDATE SET updated_at = excluded.updated_at, id = excluded.id",
+                    (tabla, seguras[-1]["updated_at"], seguras[-1]["id"], cobertura)
+                )
+            elif marca is None:
+                # Sin filas anteriores al horizonte: queda sincronizada, sin marca todavía
+                conexion.execute(
+                    "INSERT OR IGNORE INTO marcas (tabla, updated_at, id, cobertura) VALUES (?, NULL, 0, ?)",
+                    (tabla, cobertura)
+                )
+
+        if len(filas) < REPLICA_TAMANO_PAGINA:
+            return cambiadas
+        desde = (filas[-1]["updated_at"], filas[-1]["id"])
+
+@instrumentar("replica")
+def sincronizar():
+    """Trae de Supabase los cambios de todas las tablas y los notifica en el bus de eventos"""
+    with _lock_sincronizacion:
+        cambios = {tabla: _sincronizar_tabla(tabla) for tabla in _TABLAS}
+
+        # El registro anterior a la ventana replicada deja de servirse desde aquí
+        with _conexion() as conexion, _lock_escritura, conexion:
+            conexion.execute("DELETE FROM registro_actividades WHERE fecha < ?", (_limite_registro(),))
+        _estado["lista"] = True
+
+    # Los cambios hechos desde otros procesos invalidan las cachés como los propios
+    _local.sincronizando = True
+    try:
+        for tabla, filas in cambios.items():
+            eventos.publicar(tabla, "UPDATE", filas)
+    finally:
+        _local.sincronizando = False
+    return {tabla: len(filas) for tabla, filas in cambios.items()}
+
+def resincronizar():
+    """Descarta la réplica y la vuelve a cargar completa (p. ej. tras borrados físicos en Supabase)"""
+    with _conexion() as conexion, _lock_sincronizacion, _lock_escritura, conexion:
+        for tabla in list(_TABLAS) + ["marcas"]:
+            conexion.execute(f"DELETE FROM {tabla}")
+        _estado["lista"] = False
+    return sincronizar()
+
+def _al_cambiar(evento):
+    # Las escrituras propias se ven en la réplica sin esperar a la siguiente sincronización
+    if not _estado["lista"] or getattr(_local, "sincronizando", False):
+        return
+    with _conexion() as conexion, _lock_escritura, conexion:
+        _guardar(conexion, evento.tabla, evento.filas, fusionar=True)
+
+for _tabla in _TABLAS:
+    eventos.suscribir(_tabla, _al_cambiar)
+
+# Lecturas con la misma forma que las respuestas de Supabase en database
+
+def _consultar(consulta, parametros=()):
+    """Todas las filas de una consulta a la réplica"""
+    with _conexion() as conexion:
+        return conexion.execute(consulta, parametros).fetchall()
+
+def _filas(tabla, where="", parametros=()):
+    return [
+        json.loads(datos)
+        for (datos,) in _consultar(f"SELECT datos FROM {tabla} {where} ORDER BY id", parametros)
+    ]
+
+def get_tabla(tabla, solo_activos=False):
+    """Filas completas de una tabla de referencia (select *)"""
+    return _filas(tabla, "WHERE activo" if solo_activos else "")
+
+def get_miembros():
+    """Miembros activos con su sección y grupo embebidos"""
+    consulta = """
+        SELECT
+            m.id, json_extract(m.datos, '$.nip'), json_extract(m.datos, '$.nombre'), json_extract(m.datos, '$.apellidos'),
+            s.id, json_extract(s.datos, '$.nombre'), g.id, json_extract(g.datos, '$.nombre')
+        FROM miembros m
+        LEFT JOIN secciones s ON s.id = m.seccion_id
+        LEFT JOIN grupos g ON g.id = m.grupo_id
+        WHERE m.activo
+        ORDER BY m.id
+    """
+    return [{
+        "id": id, "nip": nip, "nombre": nombre, "apellidos": apellidos,
+        "secciones": {"id": seccion_id, "nombre": seccion} if seccion_id is not None else None,
+        "grupos": {"id": grupo_id, "nombre": grupo} if grupo_id is not None else None
+    } for id, nip, nombre, apellidos, seccion_id, seccion, grupo_id, grupo in _consultar(consulta)]
+
+def _embebido(id, **campos):
+    return {"id": id, **campos} if id is not None else None
+
+def _registro(fila):
+    (id, fecha, observaciones, miembro_id, nip, nombre, apellidos, actividad_id, actividad,
+     turno_id, turno, monitor_id, monitor, apellidos_monitor) = fila
+    return {
+        "id": id,
+        "fecha": fecha,
+        "observaciones": observaciones,
+        "miembros": _embebido(miembro_id, nip=nip, nombre=nombre, apellidos=apellidos),
+        "actividades": _embebido(actividad_id, nombre=actividad),
+        "turnos": _embebido(turno_id, nombre=turno),
+        "monitores": _embebido(monitor_id, nombre=monitor, apellidos=apellidos_monitor)
+    }
+
+def cubre(fecha_inicio, fecha_fin):
+    """Indica si el registro de actividades entre las dos fechas está en la réplica"""
+    if not _estado["lista"] or not (fecha_inicio and fecha_fin):
+        return False
+    cobertura = _consultar("SELECT cobertura FROM marcas WHERE tabla = 'registro_actividades'")[0][0]
+    return str(fecha_inicio) >= max(cobertura, _limite_registro())
+
+def iter_registro_actividades(fecha_inicio, fecha_fin, miembro_id=None, actividad_id=None, turno_id=None,
+                              seccion_id=None, grupo_id=None, tamano_pagina=REPLICA_TAMANO_PAGINA, desde=None):
+    """Recorre por páginas el registro replicado, de la más reciente a la más antigua (tras desde, si se indica)"""
+    condiciones = ["r.fecha >= ?", "r.fecha <= ?"]
+    parametros = [str(fecha_inicio), str(fecha_fin)]
+    for columna, valor in (
+        ("r.miembro_id", miembro_id), ("r.actividad_id", actividad_id), ("r.turno_id", turno_id),
+        ("m.seccion_id", seccion_id), ("m.grupo_id", grupo_id)
+    ):
+        if valor:
+            condiciones.append(f"{columna} = ?")
+            parametros.append(valor)
+
+    # Igual que miembros!inner en Supabase al filtrar por sección o grupo
+    select = _SELECT_REGISTRO.format(union="INNER" if seccion_id or grupo_id else "LEFT")
+
+    # Una consulta por página a partir de la última clave (fecha, id), como en Supabase:
+    # entre páginas no se retiene ninguna conexión
+    while True:
+        clave, parametros_clave = [], []
+        if desde:
+            clave = ["(r.fecha < ? OR (r.fecha = ? AND r.id < ?))"]
+            parametros_clave = [str(desde["fecha"]), str(desde["fecha"]), desde["id"]]
+        consulta = f"{select} WHERE {' AND '.join(condiciones + clave)} ORDER BY r.fecha DESC, r.id DESC LIMIT ?"
+        pagina = [_registro(fila) for fila in _consultar(consulta, parametros + parametros_clave + [tamano_pagina])]
+        if pagina:
+            yield pagina
+        if len(pagina) < tamano_pagina:
+            return
+        desde = pagina[-1]
+
+def get_registros_por_id(ids):
+    """Registros replicados con los ids indicados (los que no están en la réplica se omiten)"""
+    ids = list(ids)
+    registros = []
+    for inicio in range(0, len(ids), 500):
+        lote = ids[inicio:inicio + 500]
+        consulta = _SELECT_REGISTRO.format(union="LEFT") + f" WHERE r.id IN ({','.join('?' * len(lote))})"
+        registros.extend(_registro(fila) for fila in _consultar(consulta, lote))
+    return registros
@@ -0,0 +1,85 @@
+-- Funciones de estadísticas agregadas en el servidor (versión 1)
+--
+-- Devuelven únicamente los totales agrupados y el resultado del anti-join,
+-- de modo que la aplicación no necesita descargar registro_actividades.
+-- Los parámetros de fecha son opcionales: NULL significa "sin límite".
+
+CREATE OR REPLACE FUNCTION public.estadisticas_actividades_por_seccion_v1(
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS TABLE (seccion text, actividad text, total bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        s.nombre::text AS seccion,
+        a.nombre::text AS actividad,
+        COUNT(*) AS total
+    FROM registro_actividades ra
+    JOIN miembros m ON ra.miembro_id = m.id
+    JOIN secciones s ON m.seccion_id = s.id
+    JOIN actividades a ON ra.actividad_id = a.id
+    WHERE (p_fecha_inicio IS NULL OR ra.fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR ra.fecha <= p_fecha_fin)
+    GROUP BY s.nombre, a.nombre
+    ORDER BY s.nombre, a.nombre
+$$;
+
+CREATE OR REPLACE FUNCTION public.estadisticas_actividades_por_grupo_v1(
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS TABLE (grupo text, actividad text, total bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        g.nombre::text AS grupo,
+        a.nombre::text AS actividad,
+        COUNT(*) AS total
+    FROM registro_actividades ra
+    JOIN miembros m ON ra.miembro_id = m.id
+    JOIN grupos g ON m.grupo_id = g.id
+    JOIN actividades a ON ra.actividad_id = a.id
+    WHERE (p_fecha_inicio IS NULL OR ra.fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR ra.fecha <= p_fecha_fin)
+    GROUP BY g.nombre, a.nombre
+    ORDER BY g.nombre, a.nombre
+$$;
+
+CREATE OR REPLACE FUNCTION public.miembros_sin_actividades_v1(
+    p_fecha_inicio date,
+    p_fecha_fin date
+)
+RETURNS TABLE (
+    id bigint,
+    nip bigint,
+    nombre text,
+    apellidos text,
+    seccion text,
+    grupo text
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.id,
+        m.nip,
+        m.nombre::text,
+        m.apellidos::text,
+        s.nombre::text AS seccion,
+        g.nombre::text AS grupo
+    FROM miembros m
+    JOIN secciones s ON m.seccion_id = s.id
+    JOIN grupos g ON m.grupo_id = g.id
+    WHERE m.activo = true
+      AND NOT EXISTS (
+          SELECT 1
+          FROM registro_actividades ra
+          WHERE ra.miembro_id = m.id
+            AND ra.fecha >= p_fecha_inicio
+            AND ra.fecha <= p_fecha_fin
+      )
+    ORDER BY s.nombre, g.nombre, m.apellidos
+$$;
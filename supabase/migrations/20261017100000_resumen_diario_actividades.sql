@@ -0,0 +1,142 @@
+-- Resumen diario materializado de actividades
+--
+-- Una fila por fecha × sección × grupo × actividad × turno con el número de
+-- registros. Se mantiene de forma incremental con un disparador sobre
+-- registro_actividades y las estadísticas (versión 2) solo suman sus filas.
+--
+-- La sección y el grupo son los del miembro en el momento del registro.
+-- Los miembros sin sección o grupo se guardan con id 0 y quedan fuera de las
+-- estadísticas, igual que con el JOIN de la versión 1.
+
+CREATE TABLE IF NOT EXISTS public.resumen_diario_actividades (
+    fecha date NOT NULL,
+    seccion_id bigint NOT NULL,
+    grupo_id bigint NOT NULL,
+    actividad_id bigint NOT NULL,
+    turno_id bigint NOT NULL,
+    total integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, seccion_id, grupo_id, actividad_id, turno_id)
+);
+
+-- Disparador por sentencia: un insert de varias filas actualiza el resumen con
+-- un único upsert agregado
+CREATE OR REPLACE FUNCTION public.actualizar_resumen_diario()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO resumen_diario_actividades AS r
+        (fecha, seccion_id, grupo_id, actividad_id, turno_id, total)
+    SELECT
+        n.fecha,
+        COALESCE(m.seccion_id, 0),
+        COALESCE(m.grupo_id, 0),
+        n.actividad_id,
+        n.turno_id,
+        COUNT(*)
+    FROM nuevos n
+    JOIN miembros m ON n.miembro_id = m.id
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (fecha, seccion_id, grupo_id, actividad_id, turno_id)
+    DO UPDATE SET total = r.total + EXCLUDED.total;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS resumen_diario_tras_insertar ON public.registro_actividades;
+CREATE TRIGGER resumen_diario_tras_insertar
+    AFTER INSERT ON public.registro_actividades
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.actualizar_resumen_diario();
+
+-- Reconstrucción desde la tabla de registros (cargas históricas o tras
+-- borrar/modificar registros). Devuelve el número de filas del resumen.
+CREATE OR REPLACE FUNCTION public.reconstruir_resumen_diario(
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    filas bigint;
+BEGIN
+    -- Bloquear el resumen para que los inserts concurrentes esperen a la reconstrucción
+    LOCK TABLE resumen_diario_actividades IN EXCLUSIVE MODE;
+
+    DELETE FROM resumen_diario_actividades
+    WHERE (p_fecha_inicio IS NULL OR fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR fecha <= p_fecha_fin);
+
+    INSERT INTO resumen_diario_actividades
+        (fecha, seccion_id, grupo_id, actividad_id, turno_id, total)
+    SELECT
+        ra.fecha,
+        COALESCE(m.seccion_id, 0),
+        COALESCE(m.grupo_id, 0),
+        ra.actividad_id,
+        ra.turno_id,
+        COUNT(*)
+    FROM registro_actividades ra
+    JOIN miembros m ON ra.miembro_id = m.id
+    WHERE (p_fecha_inicio IS NULL OR ra.fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR ra.fecha <= p_fecha_fin)
+    GROUP BY 1, 2, 3, 4, 5;
+
+    GET DIAGNOSTICS filas = ROW_COUNT;
+    RETURN filas;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.estadisticas_actividades_por_seccion_v2(
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS TABLE (seccion text, actividad text, total bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        s.nombre::text AS seccion,
+        a.nombre::text AS actividad,
+        SUM(r.total)::bigint AS total
+    FROM resumen_diario_actividades r
+    JOIN secciones s ON r.seccion_id = s.id
+    JOIN actividades a ON r.actividad_id = a.id
+    WHERE (p_fecha_inicio IS NULL OR r.fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR r.fecha <= p_fecha_fin)
+    GROUP BY s.nombre, a.nombre
+    HAVING SUM(r.total) > 0
+    ORDER BY s.nombre, a.nombre
+$$;
+
+CREATE OR REPLACE FUNCTION public.estadisticas_actividades_por_grupo_v2(
+    p_fecha_inicio date DEFAULT NULL,
+    p_fecha_fin date DEFAULT NULL
+)
+RETURNS TABLE (grupo text, actividad text, total bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        g.nombre::text AS grupo,
+        a.nombre::text AS actividad,
+        SUM(r.total)::bigint AS total
+    FROM resumen_diario_actividades r
+    JOIN grupos g ON r.grupo_id = g.id
+    JOIN actividades a ON r.actividad_id = a.id
+    WHERE (p_fecha_inicio IS NULL OR r.fecha >= p_fecha_inicio)
+      AND (p_fecha_fin IS NULL OR r.fecha <= p_fecha_fin)
+    GROUP BY g.nombre, a.nombre
+    HAVING SUM(r.total) > 0
+    ORDER BY g.nombre, a.nombre
+$$;
+
+-- Carga inicial del resumen
+SELECT public.reconstruir_resumen_diario();
@@ -0,0 +1,34 @@
+-- Un miembro no puede tener la misma actividad dos veces en la misma fecha y turno.
+--
+-- Permite los inserts en lote con ON CONFLICT DO NOTHING y que la aplicación
+-- informe de los conflictos fila a fila. La aplicación anterior permitía agendar
+-- lo mismo varias veces, así que antes de crear el índice se eliminan los
+-- duplicados existentes (se conserva el registro más antiguo de cada clave).
+
+-- Los inserts concurrentes esperan: no pueden aparecer duplicados nuevos entre
+-- el borrado y la creación del índice
+LOCK TABLE public.registro_actividades IN SHARE ROW EXCLUSIVE MODE;
+
+DO $$
+DECLARE
+    borrados bigint;
+BEGIN
+    DELETE FROM public.registro_actividades r
+    USING public.registro_actividades o
+    WHERE r.miembro_id = o.miembro_id
+      AND r.actividad_id = o.actividad_id
+      AND r.fecha = o.fecha
+      AND r.turno_id = o.turno_id
+      AND r.id > o.id;
+    GET DIAGNOSTICS borrados = ROW_COUNT;
+
+    -- El resumen diario solo se mantiene con los inserts: se reconstruye si se ha borrado algo
+    IF borrados > 0 THEN
+        RAISE NOTICE 'Eliminados % registros duplicados', borrados;
+        PERFORM public.reconstruir_resumen_diario();
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS registro_actividades_miembro_actividad_fecha_turno_key
+    ON public.registro_actividades (miembro_id, actividad_id, fecha, turno_id);
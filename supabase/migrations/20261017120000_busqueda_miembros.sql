@@ -0,0 +1,60 @@
+-- Búsqueda de miembros en el servidor con índices de trigramas y de prefijo
+--
+-- buscar_miembros_v1 encuentra miembros activos cuyo nombre completo contiene
+-- el texto o se le parece (pg_trgm), o cuyo NIP empieza por el texto. Los
+-- resultados se ordenan por relevancia y se limitan a p_limite filas.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- La expresión debe coincidir exactamente con la usada en buscar_miembros_v1
+CREATE INDEX IF NOT EXISTS miembros_nombre_completo_trgm_idx
+    ON public.miembros USING gin (lower(nombre || ' ' || apellidos) gin_trgm_ops)
+    WHERE activo;
+
+CREATE INDEX IF NOT EXISTS miembros_nip_prefijo_idx
+    ON public.miembros ((nip::text) text_pattern_ops)
+    WHERE activo;
+
+CREATE OR REPLACE FUNCTION public.buscar_miembros_v1(
+    p_texto text,
+    p_limite integer DEFAULT 50
+)
+RETURNS TABLE (
+    id bigint,
+    nip bigint,
+    nombre text,
+    apellidos text,
+    seccion_id bigint,
+    grupo_id bigint,
+    relevancia real
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH busqueda AS (
+        SELECT
+            lower(trim(p_texto)) AS texto,
+            -- Escapar los comodines de LIKE que pueda contener el texto
+            replace(replace(replace(lower(trim(p_texto)), '\', '\\'), '%', '\%'), '_', '\_') AS patron
+    )
+    SELECT
+        m.id,
+        m.nip,
+        m.nombre::text,
+        m.apellidos::text,
+        m.seccion_id,
+        m.grupo_id,
+        GREATEST(
+            similarity(lower(m.nombre || ' ' || m.apellidos), b.texto),
+            CASE WHEN m.nip::text LIKE b.patron || '%' THEN 1 ELSE 0 END
+        )::real AS relevancia
+    FROM miembros m, busqueda b
+    WHERE m.activo
+      AND (
+          lower(m.nombre || ' ' || m.apellidos) LIKE '%' || b.patron || '%'
+          OR lower(m.nombre || ' ' || m.apellidos) % b.texto
+          OR m.nip::text LIKE b.patron || '%'
+      )
+    ORDER BY relevancia DESC, m.apellidos, m.nombre
+    LIMIT p_limite
+$$;
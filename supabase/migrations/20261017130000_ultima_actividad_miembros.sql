@@ -0,0 +1,162 @@
+-- Fecha de la última actividad de cada miembro
+--
+-- miembros.ultima_actividad se mantiene con disparadores sobre
+-- registro_actividades. Con ella, "miembros sin actividad en el período"
+-- (versión 2) es un recorrido por índice sobre miembros: solo los que tienen
+-- registros posteriores al período (p. ej. actividades ya agendadas) necesitan
+-- comprobar el registro, con el índice (miembro_id, fecha).
+
+ALTER TABLE public.miembros
+    ADD COLUMN IF NOT EXISTS ultima_actividad date;
+
+CREATE INDEX IF NOT EXISTS miembros_ultima_actividad_idx
+    ON public.miembros (ultima_actividad)
+    WHERE activo;
+
+CREATE INDEX IF NOT EXISTS registro_actividades_miembro_fecha_idx
+    ON public.registro_actividades (miembro_id, fecha);
+
+-- Inserts: un único UPDATE agregado por sentencia
+CREATE OR REPLACE FUNCTION public.actualizar_ultima_actividad()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    UPDATE miembros m
+    SET ultima_actividad = GREATEST(m.ultima_actividad, n.fecha)
+    FROM (
+        SELECT miembro_id, MAX(fecha) AS fecha
+        FROM nuevos
+        GROUP BY miembro_id
+    ) n
+    WHERE m.id = n.miembro_id
+      AND (m.ultima_actividad IS NULL OR m.ultima_actividad < n.fecha);
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS ultima_actividad_tras_insertar ON public.registro_actividades;
+CREATE TRIGGER ultima_actividad_tras_insertar
+    AFTER INSERT ON public.registro_actividades
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.actualizar_ultima_actividad();
+
+-- Recalcula la última actividad de los miembros indicados (todos si es NULL).
+-- Sirve de carga inicial y para corregir desviaciones. Devuelve los miembros actualizados.
+CREATE OR REPLACE FUNCTION public.actualizar_ultima_actividad_desde(
+    p_miembro_ids bigint[] DEFAULT NULL
+)
+RETURNS bigint
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    filas bigint;
+BEGIN
+    UPDATE miembros m
+    SET ultima_actividad = u.fecha
+    FROM (
+        SELECT mi.id, MAX(ra.fecha) AS fecha
+        FROM miembros mi
+        LEFT JOIN registro_actividades ra ON ra.miembro_id = mi.id
+        WHERE p_miembro_ids IS NULL OR mi.id = ANY (p_miembro_ids)
+        GROUP BY mi.id
+    ) u
+    WHERE m.id = u.id
+      AND m.ultima_actividad IS DISTINCT FROM u.fecha;
+
+    GET DIAGNOSTICS filas = ROW_COUNT;
+    RETURN filas;
+END;
+$$;
+
+-- Borrados y cambios de fecha o miembro: se recalcula para los miembros afectados
+CREATE OR REPLACE FUNCTION public.recalcular_ultima_actividad()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM actualizar_ultima_actividad_desde(ARRAY(SELECT DISTINCT miembro_id FROM anteriores));
+    ELSE
+        PERFORM actualizar_ultima_actividad_desde(ARRAY(
+            SELECT miembro_id FROM anteriores
+            UNION
+            SELECT miembro_id FROM nuevos
+        ));
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS ultima_actividad_tras_borrar ON public.registro_actividades;
+CREATE TRIGGER ultima_actividad_tras_borrar
+    AFTER DELETE ON public.registro_actividades
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.recalcular_ultima_actividad();
+
+DROP TRIGGER IF EXISTS ultima_actividad_tras_modificar ON public.registro_actividades;
+CREATE TRIGGER ultima_actividad_tras_modificar
+    AFTER UPDATE ON public.registro_actividades
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.recalcular_ultima_actividad();
+
+-- Miembros activos sin actividad en el período, usando ultima_actividad:
+--   * sin registros o con el último antes del período: sin actividad
+--   * último registro dentro del período: con actividad
+--   * último registro después del período: se comprueba el registro por índice
+CREATE OR REPLACE FUNCTION public.miembros_sin_actividades_v2(
+    p_fecha_inicio date,
+    p_fecha_fin date
+)
+RETURNS TABLE (
+    id bigint,
+    nip bigint,
+    nombre text,
+    apellidos text,
+    seccion text,
+    grupo text
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.id,
+        m.nip,
+        m.nombre::text,
+        m.apellidos::text,
+        s.nombre::text AS seccion,
+        g.nombre::text AS grupo
+    FROM miembros m
+    JOIN secciones s ON m.seccion_id = s.id
+    JOIN grupos g ON m.grupo_id = g.id
+    WHERE m.activo = true
+      AND (
+          m.ultima_actividad IS NULL
+          OR m.ultima_actividad < p_fecha_inicio
+          OR (
+              m.ultima_actividad > p_fecha_fin
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM registro_actividades ra
+                  WHERE ra.miembro_id = m.id
+                    AND ra.fecha >= p_fecha_inicio
+                    AND ra.fecha <= p_fecha_fin
+              )
+          )
+      )
+    ORDER BY s.nombre, g.nombre, m.apellidos
+$$;
+
+-- Carga inicial
+SELECT public.actualizar_ultima_actividad_desde();
@@ -0,0 +1,32 @@
+-- Registro de actividades en forma compacta para la analítica de tendencias
+--
+-- Devuelve una sola fila con un array por columna (miembro, día desde el
+-- inicio del período, actividad, turno y sección del miembro) en lugar de una
+-- fila JSON por registro: un año de historia cabe en una única respuesta sin
+-- paginar y ocupa una fracción del JSON equivalente.
+
+CREATE OR REPLACE FUNCTION public.registro_compacto_v1(
+    p_fecha_inicio date,
+    p_fecha_fin date
+)
+RETURNS TABLE (
+    miembro_id bigint[],
+    dia integer[],
+    actividad_id bigint[],
+    turno_id bigint[],
+    seccion_id bigint[]
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        COALESCE(array_agg(ra.miembro_id ORDER BY ra.fecha, ra.id), '{}'),
+        COALESCE(array_agg(ra.fecha - p_fecha_inicio ORDER BY ra.fecha, ra.id), '{}'),
+        COALESCE(array_agg(ra.actividad_id ORDER BY ra.fecha, ra.id), '{}'),
+        COALESCE(array_agg(ra.turno_id ORDER BY ra.fecha, ra.id), '{}'),
+        COALESCE(array_agg(COALESCE(m.seccion_id, 0) ORDER BY ra.fecha, ra.id), '{}')
+    FROM registro_actividades ra
+    JOIN miembros m ON ra.miembro_id = m.id
+    WHERE ra.fecha >= p_fecha_inicio
+      AND ra.fecha <= p_fecha_fin
+$$;
@@ -0,0 +1,60 @@
+-- Marca de modificación para la réplica local (sincronización incremental)
+--
+-- Cada tabla replicada tiene updated_at, que fija un disparador en cada insert
+-- y update. La réplica pide las filas con (updated_at, id) posterior a la última
+-- marca vista, ordenadas por ese mismo índice.
+--
+-- Los borrados físicos no dejan rastro: la aplicación no borra filas (los
+-- miembros se marcan como inactivos) y la réplica se puede reconstruir con
+-- replica.resincronizar().
+
+-- Los argumentos del disparador son columnas que no cuentan como modificación:
+-- un UPDATE que solo cambia esas columnas conserva updated_at
+CREATE OR REPLACE FUNCTION public.fijar_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    ignoradas text[] := COALESCE(TG_ARGV, '{}'::text[]) || ARRAY['updated_at'];
+BEGIN
+    IF TG_OP = 'UPDATE' AND (to_jsonb(NEW) - ignoradas) = (to_jsonb(OLD) - ignoradas) THEN
+        NEW.updated_at := OLD.updated_at;
+    ELSE
+        NEW.updated_at := clock_timestamp();
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DO $$
+DECLARE
+    tabla text;
+    argumentos text;
+BEGIN
+    FOREACH tabla IN ARRAY ARRAY[
+        'miembros', 'secciones', 'grupos', 'turnos', 'actividades', 'monitores', 'registro_actividades'
+    ]
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE public.%I ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now()',
+            tabla
+        );
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS %I ON public.%I (updated_at, id)',
+            tabla || '_updated_at_id_idx', tabla
+        );
+
+        -- miembros.ultima_actividad cambia con cada registro de actividad (disparador
+        -- de ultima_actividad_miembros). Si contara, cada sincronización traería como
+        -- modificados a todos los miembros con actividad y vaciaría sus cachés
+        argumentos := CASE WHEN tabla = 'miembros' THEN quote_literal('ultima_actividad') ELSE '' END;
+
+        EXECUTE format('DROP TRIGGER IF EXISTS fijar_updated_at ON public.%I', tabla);
+        EXECUTE format(
+            'CREATE TRIGGER fijar_updated_at BEFORE INSERT OR UPDATE ON public.%I '
+            'FOR EACH ROW EXECUTE FUNCTION public.fijar_updated_at(%s)',
+            tabla, argumentos
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,13 @@
+-- Clave de idempotencia de los registros anotados en el diario local
+--
+-- El diario de escritura diferida (diario.py) asigna a cada registro una clave
+-- única antes de enviarlo. Si un envío se repite (p. ej. se cortó la conexión
+-- después de insertar y antes de recibir la respuesta), el insert con
+-- ON CONFLICT (clave_idempotencia) DO NOTHING no lo duplica. Los registros
+-- creados por otras vías la dejan a NULL, que no entra en conflicto.
+
+ALTER TABLE public.registro_actividades
+    ADD COLUMN IF NOT EXISTS clave_idempotencia uuid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS registro_actividades_clave_idempotencia_key
+    ON public.registro_actividades (clave_idempotencia);
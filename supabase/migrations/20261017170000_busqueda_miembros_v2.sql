@@ -0,0 +1,62 @@
+-- Búsqueda de miembros filtrada por sección y grupo antes del límite
+--
+-- buscar_miembros_v1 limita a p_limite filas entre todos los miembros y la
+-- aplicación filtraba después por sección y grupo, así que los miembros de la
+-- sección elegida que quedaban fuera de los primeros p_limite no aparecían.
+-- buscar_miembros_v2 aplica esos filtros antes del LIMIT.
+--
+-- Además, el patrón del LIKE sobre el NIP se calcula a partir del parámetro
+-- en el propio WHERE (en v1 venía de un CTE): con un valor concreto de
+-- p_texto es una constante al planificar la consulta y
+-- miembros_nip_prefijo_idx (text_pattern_ops) se puede usar.
+
+-- Texto con los comodines de LIKE escapados (IMMUTABLE: se evalúa al planificar)
+CREATE OR REPLACE FUNCTION public.escapar_like(p_texto text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT replace(replace(replace(p_texto, '\', '\\'), '%', '\%'), '_', '\_')
+$$;
+
+CREATE OR REPLACE FUNCTION public.buscar_miembros_v2(
+    p_texto text,
+    p_limite integer DEFAULT 50,
+    p_seccion_id bigint DEFAULT NULL,
+    p_grupo_id bigint DEFAULT NULL
+)
+RETURNS TABLE (
+    id bigint,
+    nip bigint,
+    nombre text,
+    apellidos text,
+    seccion_id bigint,
+    grupo_id bigint,
+    relevancia real
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        m.id,
+        m.nip,
+        m.nombre::text,
+        m.apellidos::text,
+        m.seccion_id,
+        m.grupo_id,
+        GREATEST(
+            similarity(lower(m.nombre || ' ' || m.apellidos), lower(trim(p_texto))),
+            CASE WHEN m.nip::text LIKE public.escapar_like(lower(trim(p_texto))) || '%' THEN 1 ELSE 0 END
+        )::real AS relevancia
+    FROM miembros m
+    WHERE m.activo
+      AND (p_seccion_id IS NULL OR m.seccion_id = p_seccion_id)
+      AND (p_grupo_id IS NULL OR m.grupo_id = p_grupo_id)
+      AND (
+          lower(m.nombre || ' ' || m.apellidos) LIKE '%' || public.escapar_like(lower(trim(p_texto))) || '%'
+          OR lower(m.nombre || ' ' || m.apellidos) % lower(trim(p_texto))
+          OR m.nip::text LIKE public.escapar_like(lower(trim(p_texto))) || '%'
+      )
+    ORDER BY relevancia DESC, m.apellidos, m.nombre
+    LIMIT p_limite
+$$;